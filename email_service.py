@@ -1,30 +1,39 @@
 import os
+import string
 from datetime import datetime
 import logging
 
 logger = logging.getLogger(__name__)
 
-async def send_certificate_email(user_email, user_name, afap_numero, afap_data):
-    """
-    Envía email automático con el certificado AFAP
-    En producción, aquí se integraría con Resend, SendGrid, etc.
-    Por ahora, simula el envío y registra en logs
-    """
-    try:
-        # Simulación del email
-        email_content = f"""
-        Estimado/a {user_name},
+# Constantes a nivel módulo: evita reconstruir el dict de mensajes y re-alocar
+# la URL del portal en cada notificación
+_PORTAL_URL = os.getenv(
+    "PORTAL_URL",
+    "https://municipality-portal.preview.emergentagent.com/mis-solicitudes",
+)
+
+_STATUS_MESSAGES = {
+    "pendiente": "está pendiente de revisión",
+    "inspeccion": "fue programada para inspección",
+    "aprobado": "fue APROBADA ✓",
+    "rechazado": "fue rechazada",
+}
 
-        ¡Felicitaciones! Tu solicitud AFAP #{afap_numero} ha sido APROBADA.
+# Plantillas precompiladas una sola vez al importar: cada envío hace un único
+# pase de sustitución en lugar de re-armar el cuerpo completo con f-strings
+_CERT_TPL = string.Template("""
+        Estimado/a $user_name,
+
+        ¡Felicitaciones! Tu solicitud AFAP #$afap_numero ha sido APROBADA.
 
         Detalles:
-        - Comercio: {afap_data.get('rubro_descripcion', '')}
-        - Domicilio: {afap_data.get('domicilio_calle', '')} {afap_data.get('domicilio_altura', '')}
-        - Superficie: {afap_data.get('metros_cuadrados', '')} m²
+        - Comercio: $rubro
+        - Domicilio: $domicilio
+        - Superficie: $superficie m²
         - Vigencia: 30 días desde la fecha de emisión
 
         Podés descargar tu certificado ingresando a:
-        https://municipality-portal.preview.emergentagent.com/mis-solicitudes
+        $portal_url
 
         El certificado debe ser exhibido en lugar visible del establecimiento.
 
@@ -35,24 +44,54 @@ async def send_certificate_email(user_email, user_name, afap_numero, afap_data):
 
         Argentina
         Dirección de Habilitaciones
-        """
-        
+        """)
+
+_STATUS_TPL = string.Template("""
+        Estimado/a $user_name,
+
+        Tu solicitud AFAP #$afap_numero $message.
+
+        $observaciones
+
+        Podés ver el estado actualizado ingresando a:
+        $portal_url
+
+        Argentina
+        """)
+
+async def send_certificate_email(user_email, user_name, afap_numero, afap_data):
+    """
+    Envía email automático con el certificado AFAP
+    En producción, aquí se integraría con Resend, SendGrid, etc.
+    Por ahora, simula el envío y registra en logs
+    """
+    try:
+        # Simulación del email
+        email_content = _CERT_TPL.substitute(
+            user_name=user_name,
+            afap_numero=afap_numero,
+            rubro=afap_data.get('rubro_descripcion', ''),
+            domicilio=f"{afap_data.get('domicilio_calle', '')} {afap_data.get('domicilio_altura', '')}",
+            superficie=afap_data.get('metros_cuadrados', ''),
+            portal_url=_PORTAL_URL,
+        )
+
         # Log del email (en producción sería un envío real)
-        logger.info(f"📧 EMAIL SIMULADO enviado a: {user_email}")
-        logger.info(f"   Asunto: AFAP #{afap_numero} - Certificado Aprobado")
-        logger.info(f"   Usuario: {user_name}")
-        
+        logger.info("📧 EMAIL SIMULADO enviado a: %s", user_email)
+        logger.info("   Asunto: AFAP #%s - Certificado Aprobado", afap_numero)
+        logger.info("   Usuario: %s", user_name)
+
         # En producción, aquí iría:
         # await send_email_via_resend(user_email, "AFAP Aprobado", email_content, pdf_attachment)
-        
+
         return {
             "success": True,
             "message": f"Email enviado a {user_email}",
             "timestamp": datetime.now().isoformat()
         }
-        
+
     except Exception as e:
-        logger.error(f"Error sending email: {str(e)}")
+        logger.exception("Error sending email: %s", e)
         return {
             "success": False,
             "error": str(e)
@@ -63,33 +102,21 @@ async def send_status_notification(user_email, user_name, afap_numero, old_statu
     Envía notificación cuando cambia el estado de un AFAP
     """
     try:
-        status_messages = {
-            "pendiente": "está pendiente de revisión",
-            "inspeccion": "fue programada para inspección",
-            "aprobado": "fue APROBADA ✓",
-            "rechazado": "fue rechazada"
-        }
-        
-        message = status_messages.get(new_status, f"cambió a {new_status}")
-        
-        email_content = f"""
-        Estimado/a {user_name},
+        message = _STATUS_MESSAGES.get(new_status, f"cambió a {new_status}")
 
-        Tu solicitud AFAP #{afap_numero} {message}.
+        email_content = _STATUS_TPL.substitute(
+            user_name=user_name,
+            afap_numero=afap_numero,
+            message=message,
+            observaciones=f'Observaciones: {observaciones}' if observaciones else '',
+            portal_url=_PORTAL_URL,
+        )
 
-        {f'Observaciones: {observaciones}' if observaciones else ''}
+        logger.info("📧 NOTIFICACIÓN enviada a: %s", user_email)
+        logger.info("   AFAP #%s: %s → %s", afap_numero, old_status, new_status)
 
-        Podés ver el estado actualizado ingresando a:
-        https://municipality-portal.preview.emergentagent.com/mis-solicitudes
-
-        Argentina
-        """
-        
-        logger.info(f"📧 NOTIFICACIÓN enviada a: {user_email}")
-        logger.info(f"   AFAP #{afap_numero}: {old_status} → {new_status}")
-        
         return {"success": True}
-        
+
     except Exception as e:
-        logger.error(f"Error sending notification: {str(e)}")
+        logger.exception("Error sending notification: %s", e)
         return {"success": False, "error": str(e)}
@@ -0,0 +1,41 @@
+import asyncio
+import os
+from pymongo import AsyncMongoClient
+
+# Campos de fecha por colección que históricamente se guardaron como string ISO
+_DATE_FIELDS = {
+    "users": ["created_at"],
+    "afap": ["fecha_solicitud", "fecha_vencimiento"],
+    "inspecciones": ["fecha_programada", "fecha_realizada", "created_at"],
+    "chat_messages": ["timestamp"],
+    "download_logs": ["timestamp"],
+}
+
+async def migrate_dates():
+    """
+    Migración one-shot: convierte las fechas guardadas como string ISO a BSON
+    Date usando $toDate en el servidor. Idempotente: solo toca documentos
+    donde el campo sigue siendo string.
+    """
+    mongo_url = os.getenv("MONGO_URL", "mongodb://localhost:27017")
+    db_name = os.getenv("DB_NAME", "buenosaires_permits")
+
+    client = AsyncMongoClient(mongo_url)
+    db = client[db_name]
+
+    for collection, fields in _DATE_FIELDS.items():
+        for field in fields:
+            result = await db[collection].update_many(
+                {field: {"$type": "string"}},
+                [{"$set": {field: {"$toDate": f"${field}"}}}]
+            )
+            if result.modified_count:
+                print(f"✓ {collection}.{field}: {result.modified_count} documentos convertidos")
+
+    print("\n✅ Migración de fechas completada")
+    await client.close()
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+    load_dotenv()
+    asyncio.run(migrate_dates())
@@ -1,37 +1,62 @@
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.lib.units import inch, cm
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY, TA_LEFT
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import cm
 from reportlab.lib import colors
+from reportlab.lib.utils import ImageReader
 from reportlab.pdfgen import canvas
 from datetime import datetime
+from functools import lru_cache
 from io import BytesIO
-import qrcode
-from PIL import Image as PILImage
+import segno
 import os
 
+@lru_cache(maxsize=1024)
+def _qr_png_bytes(data):
+    """
+    Codifica un QR a PNG. La URL de verificación de un AFAP es inmutable,
+    así que el resultado se memoiza: regenerar el certificado (re-descargas)
+    se ahorra el trabajo de ECC/selección de máscara del encoder.
+    """
+    # segno escribe el PNG directamente, sin rasterizar vía PIL
+    buffer = BytesIO()
+    segno.make(data, error='l').save(buffer, kind='png', scale=10, border=4)
+    return buffer.getvalue()
+
 def generate_qr_code(data):
     """
     Genera un código QR y lo retorna como imagen
     """
-    qr = qrcode.QRCode(
-        version=1,
-        error_correction=qrcode.constants.ERROR_CORRECT_L,
-        box_size=10,
-        border=4,
-    )
-    qr.add_data(data)
-    qr.make(fit=True)
-    
-    img = qr.make_image(fill_color="black", back_color="white")
-    
     # Convertir a BytesIO para usar con ReportLab
-    buffer = BytesIO()
-    img.save(buffer, format='PNG')
-    buffer.seek(0)
-    
-    return buffer
+    return BytesIO(_qr_png_bytes(data))
+
+# Colors
+HEADER_COLOR = colors.HexColor('#0F172A')   # Slate 900
+BLUE_COLOR = colors.HexColor('#2563EB')     # Blue 600
+EMERALD_COLOR = colors.HexColor('#10B981')  # Emerald 500
+
+# Posiciones verticales del layout (fijas: la descripción siempre reserva
+# dos líneas, así el fondo estático puede dibujarse como un form XObject)
+_WIDTH, _HEIGHT = A4
+_Y_TITULAR = _HEIGHT - 8*cm
+_Y_CUIT = _Y_TITULAR - 0.7*cm
+_Y_DOMICILIO_LABEL = _Y_CUIT - 1*cm
+_Y_DOMICILIO = _Y_DOMICILIO_LABEL - 0.7*cm
+_Y_LOCALIDAD = _Y_DOMICILIO - 0.7*cm
+_Y_RUBRO = _Y_LOCALIDAD - 1*cm
+_Y_ACTIVIDAD = _Y_RUBRO - 0.7*cm
+_Y_SUPERFICIE = _Y_ACTIVIDAD - 0.5*cm - 0.7*cm
+_Y_EMISION = _Y_SUPERFICIE - 1.5*cm
+_Y_VENCIMIENTO = _Y_EMISION - 0.7*cm
+_Y_IMPORTANTE = _Y_VENCIMIENTO - 1.5*cm
+_Y_LEGAL = _Y_IMPORTANTE - 0.6*cm
+_Y_FIRMA = _Y_LEGAL - 5*0.5*cm - 1*cm
+
+TEXTO_LEGAL = [
+    "• Esta autorización tiene carácter PRECARIO y validez de 30 días corridos.",
+    "• Permite el inicio de actividades mientras se tramita la habilitación definitiva.",
+    "• No exime del cumplimiento de las normativas municipales vigentes.",
+    "• Debe exhibirse en lugar visible del establecimiento.",
+    "• La municipalidad se reserva el derecho de realizar inspecciones.",
+]
 
 def add_watermark(canvas_obj, width, height, text):
     """
@@ -40,84 +65,139 @@ def add_watermark(canvas_obj, width, height, text):
     canvas_obj.saveState()
     canvas_obj.setFillColor(colors.HexColor('#F1F5F9'), alpha=0.3)
     canvas_obj.setFont("Helvetica-Bold", 60)
-    
+
     # Rotar y posicionar el texto diagonal
     canvas_obj.translate(width/2, height/2)
     canvas_obj.rotate(45)
     canvas_obj.drawCentredString(0, 0, text)
-    
+
     canvas_obj.restoreState()
 
-def generate_afap_certificate(afap_data):
+def _draw_static_template(pdf, width, height):
     """
-    Genera un certificado AFAP en PDF con QR Code, Watermark y Firma Digital
+    Dibuja todo el contenido fijo del certificado (marca de agua, encabezado,
+    etiquetas, texto legal, recuadro de firma, footer) dentro de un form
+    XObject: el stream de la página solo lo referencia y el generador por
+    certificado dibuja únicamente los campos variables.
     """
-    buffer = BytesIO()
-    
-    # Create the PDF object
-    pdf = canvas.Canvas(buffer, pagesize=A4)
-    width, height = A4
-    
-    # Colors
-    header_color = colors.HexColor('#0F172A')  # Slate 900
-    blue_color = colors.HexColor('#2563EB')    # Blue 600
-    emerald_color = colors.HexColor('#10B981') # Emerald 500
-    
+    pdf.beginForm("afap_tpl", 0, 0, width, height)
+    pdf.saveState()
+
     # Add watermark
     add_watermark(pdf, width, height, "ARGENTINA")
-    
+
     # Header - Municipalidad
-    pdf.setFillColor(header_color)
+    pdf.setFillColor(HEADER_COLOR)
     pdf.setFont("Helvetica-Bold", 20)
     pdf.drawCentredString(width/2, height - 1.5*cm, "ARGENTINA HABILITACIONES")
-    
+
     pdf.setFont("Helvetica", 12)
     pdf.drawCentredString(width/2, height - 2*cm, "Dirección de Habilitaciones Comerciales")
-    
+
     # Línea separadora
-    pdf.setStrokeColor(blue_color)
+    pdf.setStrokeColor(BLUE_COLOR)
     pdf.setLineWidth(2)
     pdf.line(2*cm, height - 2.5*cm, width - 2*cm, height - 2.5*cm)
-    
+
     # Título del certificado
-    pdf.setFillColor(blue_color)
+    pdf.setFillColor(BLUE_COLOR)
     pdf.setFont("Helvetica-Bold", 18)
     pdf.drawCentredString(width/2, height - 4*cm, "AUTORIZACIÓN DE FUNCIONAMIENTO")
     pdf.drawCentredString(width/2, height - 4.5*cm, "AUTOMÁTICO PRECARIA (AFAP)")
-    
-    # Número de AFAP con badge
-    pdf.setFillColor(emerald_color)
+
+    # Badge del número de AFAP (el número se dibuja aparte)
+    pdf.setFillColor(EMERALD_COLOR)
     pdf.roundRect(width/2 - 3*cm, height - 6*cm, 6*cm, 0.8*cm, 0.3*cm, fill=1)
-    pdf.setFillColor(colors.white)
-    pdf.setFont("Helvetica-Bold", 14)
-    pdf.drawCentredString(width/2, height - 5.7*cm, f"N° {afap_data['numero_afap']}")
-    
+
     # Estado: APROBADO
-    pdf.setFillColor(emerald_color)
+    pdf.setFillColor(EMERALD_COLOR)
     pdf.setFont("Helvetica-Bold", 10)
     pdf.drawCentredString(width/2, height - 6.5*cm, "✓ APROBADO")
-    
-    # Información del titular
-    y_pos = height - 8*cm
+
+    # Etiquetas de los campos
     pdf.setFillColor(colors.black)
     pdf.setFont("Helvetica-Bold", 11)
-    pdf.drawString(2*cm, y_pos, "TITULAR:")
-    pdf.setFont("Helvetica", 11)
-    pdf.drawString(5*cm, y_pos, afap_data.get('titular_nombre', ''))
-    
-    y_pos -= 0.7*cm
-    pdf.setFont("Helvetica-Bold", 11)
-    pdf.drawString(2*cm, y_pos, "CUIT/CUIL:")
+    pdf.drawString(2*cm, _Y_TITULAR, "TITULAR:")
+    pdf.drawString(2*cm, _Y_CUIT, "CUIT/CUIL:")
+    pdf.drawString(2*cm, _Y_DOMICILIO_LABEL, "DOMICILIO DEL COMERCIO:")
+    pdf.drawString(2*cm, _Y_RUBRO, "RUBRO:")
+    pdf.drawString(2*cm, _Y_ACTIVIDAD, "ACTIVIDAD:")
+    pdf.drawString(2*cm, _Y_SUPERFICIE, "SUPERFICIE:")
+    pdf.drawString(2*cm, _Y_EMISION, "FECHA DE EMISIÓN:")
+    pdf.drawString(2*cm, _Y_VENCIMIENTO, "FECHA DE VENCIMIENTO:")
+
+    # Texto legal
+    pdf.setFont("Helvetica-Bold", 10)
+    pdf.drawString(2*cm, _Y_IMPORTANTE, "IMPORTANTE:")
+
+    pdf.setFont("Helvetica", 9)
+    y_pos = _Y_LEGAL
+    for linea in TEXTO_LEGAL:
+        pdf.drawString(2*cm, y_pos, linea)
+        y_pos -= 0.5*cm
+
+    # Recuadro de firma digital
+    pdf.setStrokeColor(colors.black)
+    pdf.setLineWidth(1)
+    pdf.rect(width - 8*cm, _Y_FIRMA - 3*cm, 6*cm, 2.5*cm)
+
+    # Firma Digital Badge
+    pdf.setFillColor(BLUE_COLOR)
+    pdf.roundRect(width - 7.5*cm, _Y_FIRMA - 0.8*cm, 5*cm, 0.6*cm, 0.2*cm, fill=1)
+    pdf.setFillColor(colors.white)
+    pdf.setFont("Helvetica-Bold", 8)
+    pdf.drawCentredString(width - 5*cm, _Y_FIRMA - 0.6*cm, "🔒 FIRMADO DIGITALMENTE")
+
+    pdf.setFillColor(colors.black)
+    pdf.setFont("Helvetica", 9)
+    pdf.drawCentredString(width - 5*cm, _Y_FIRMA - 1.3*cm, "Dirección de Habilitaciones")
+    pdf.drawCentredString(width - 5*cm, _Y_FIRMA - 1.8*cm, "Argentina Habilitaciones")
+
+    # Label del QR
+    pdf.setFont("Helvetica-Bold", 9)
+    pdf.drawCentredString(3.5*cm, 1.5*cm, "Escanear para verificar")
+
+    # Footer
+    pdf.setFont("Helvetica", 8)
+    pdf.setFillColor(colors.grey)
+    pdf.drawCentredString(width/2, 1.5*cm, "Argentina Habilitaciones - Sistema de Habilitaciones Digitales")
+
+    # Número de página y validez
+    pdf.setFont("Helvetica-Bold", 7)
+    pdf.setFillColor(EMERALD_COLOR)
+    pdf.drawString(2*cm, 0.5*cm, "✓ DOCUMENTO VÁLIDO")
+    pdf.setFillColor(colors.grey)
+    pdf.drawRightString(width - 2*cm, 0.5*cm, "Página 1 de 1")
+
+    pdf.restoreState()
+    pdf.endForm()
+    pdf.doForm("afap_tpl")
+
+def _generate_certificate_reportlab(afap_data):
+    """
+    Genera el certificado con ReportLab (canvas + form XObject estático)
+    """
+    buffer = BytesIO()
+
+    # Create the PDF object
+    pdf = canvas.Canvas(buffer, pagesize=A4)
+    width, height = A4
+
+    # Fondo estático (layout completo) como form XObject
+    _draw_static_template(pdf, width, height)
+
+    # Número de AFAP sobre el badge
+    pdf.setFillColor(colors.white)
+    pdf.setFont("Helvetica-Bold", 14)
+    pdf.drawCentredString(width/2, height - 5.7*cm, f"N° {afap_data['numero_afap']}")
+
+    # Información del titular
+    pdf.setFillColor(colors.black)
     pdf.setFont("Helvetica", 11)
-    pdf.drawString(5*cm, y_pos, afap_data.get('titular_cuit', ''))
-    
+    pdf.drawString(5*cm, _Y_TITULAR, afap_data.get('titular_nombre', ''))
+    pdf.drawString(5*cm, _Y_CUIT, afap_data.get('titular_cuit', ''))
+
     # Domicilio del comercio
-    y_pos -= 1*cm
-    pdf.setFont("Helvetica-Bold", 11)
-    pdf.drawString(2*cm, y_pos, "DOMICILIO DEL COMERCIO:")
-    
-    y_pos -= 0.7*cm
-    pdf.setFont("Helvetica", 11)
     domicilio = f"{afap_data.get('domicilio_calle', '')} {afap_data.get('domicilio_altura', '')}"
     if afap_data.get('domicilio_piso'):
         domicilio += f", Piso {afap_data['domicilio_piso']}"
@@ -125,97 +205,40 @@ def generate_afap_certificate(afap_data):
         domicilio += f", Depto {afap_data['domicilio_depto']}"
     if afap_data.get('domicilio_local'):
         domicilio += f", Local {afap_data['domicilio_local']}"
-    pdf.drawString(2*cm, y_pos, domicilio)
-    
-    y_pos -= 0.7*cm
-    pdf.drawString(2*cm, y_pos, f"{afap_data.get('domicilio_localidad', 'Argentina')}")
-    
+    pdf.drawString(2*cm, _Y_DOMICILIO, domicilio)
+    pdf.drawString(2*cm, _Y_LOCALIDAD, f"{afap_data.get('domicilio_localidad', 'Argentina')}")
+
     # Rubro
-    y_pos -= 1*cm
-    pdf.setFont("Helvetica-Bold", 11)
-    pdf.drawString(2*cm, y_pos, "RUBRO:")
-    pdf.setFont("Helvetica", 11)
-    pdf.drawString(5*cm, y_pos, afap_data.get('rubro_tipo', ''))
-    
-    y_pos -= 0.7*cm
-    pdf.setFont("Helvetica-Bold", 11)
-    pdf.drawString(2*cm, y_pos, "ACTIVIDAD:")
-    pdf.setFont("Helvetica", 11)
-    
+    pdf.drawString(5*cm, _Y_RUBRO, afap_data.get('rubro_tipo', ''))
+
     # Wrap long text
     descripcion = afap_data.get('rubro_descripcion', '')
     if len(descripcion) > 70:
-        pdf.drawString(5*cm, y_pos, descripcion[:70])
-        y_pos -= 0.5*cm
-        pdf.drawString(5*cm, y_pos, descripcion[70:140])
+        pdf.drawString(5*cm, _Y_ACTIVIDAD, descripcion[:70])
+        pdf.drawString(5*cm, _Y_ACTIVIDAD - 0.5*cm, descripcion[70:140])
     else:
-        pdf.drawString(5*cm, y_pos, descripcion)
-    
-    y_pos -= 0.7*cm
-    pdf.setFont("Helvetica-Bold", 11)
-    pdf.drawString(2*cm, y_pos, "SUPERFICIE:")
-    pdf.setFont("Helvetica", 11)
-    pdf.drawString(5*cm, y_pos, f"{afap_data.get('metros_cuadrados', '')} m²")
-    
-    # Fechas
-    y_pos -= 1.5*cm
-    pdf.setFont("Helvetica-Bold", 11)
-    pdf.drawString(2*cm, y_pos, "FECHA DE EMISIÓN:")
-    pdf.setFont("Helvetica", 11)
-    fecha_emision = datetime.fromisoformat(afap_data.get('fecha_solicitud', datetime.now().isoformat()))
-    pdf.drawString(6*cm, y_pos, fecha_emision.strftime('%d/%m/%Y'))
-    
-    y_pos -= 0.7*cm
-    pdf.setFont("Helvetica-Bold", 11)
-    pdf.drawString(2*cm, y_pos, "FECHA DE VENCIMIENTO:")
-    pdf.setFont("Helvetica", 11)
+        pdf.drawString(5*cm, _Y_ACTIVIDAD, descripcion)
+
+    pdf.drawString(5*cm, _Y_SUPERFICIE, f"{afap_data.get('metros_cuadrados', '')} m²")
+
+    # Fechas: llegan como datetime (BSON Date); se parsea solo si algún
+    # documento viejo todavía trae strings ISO
+    fecha_emision = afap_data.get('fecha_solicitud') or datetime.now()
+    if isinstance(fecha_emision, str):
+        fecha_emision = datetime.fromisoformat(fecha_emision)
+    pdf.drawString(6*cm, _Y_EMISION, fecha_emision.strftime('%d/%m/%Y'))
     if afap_data.get('fecha_vencimiento'):
-        fecha_venc = datetime.fromisoformat(afap_data['fecha_vencimiento'])
-        pdf.drawString(6*cm, y_pos, fecha_venc.strftime('%d/%m/%Y'))
-    
-    # Texto legal
-    y_pos -= 1.5*cm
-    pdf.setFont("Helvetica-Bold", 10)
-    pdf.drawString(2*cm, y_pos, "IMPORTANTE:")
-    
-    y_pos -= 0.6*cm
-    pdf.setFont("Helvetica", 9)
-    texto_legal = [
-        "• Esta autorización tiene carácter PRECARIO y validez de 30 días corridos.",
-        "• Permite el inicio de actividades mientras se tramita la habilitación definitiva.",
-        "• No exime del cumplimiento de las normativas municipales vigentes.",
-        "• Debe exhibirse en lugar visible del establecimiento.",
-        "• La municipalidad se reserva el derecho de realizar inspecciones.",
-    ]
-    
-    for linea in texto_legal:
-        pdf.drawString(2*cm, y_pos, linea)
-        y_pos -= 0.5*cm
-    
-    # Recuadro de firma digital
-    y_pos -= 1*cm
-    pdf.setStrokeColor(colors.black)
-    pdf.setLineWidth(1)
-    pdf.rect(width - 8*cm, y_pos - 3*cm, 6*cm, 2.5*cm)
-    
-    # Firma Digital Badge
-    pdf.setFillColor(blue_color)
-    pdf.roundRect(width - 7.5*cm, y_pos - 0.8*cm, 5*cm, 0.6*cm, 0.2*cm, fill=1)
-    pdf.setFillColor(colors.white)
-    pdf.setFont("Helvetica-Bold", 8)
-    pdf.drawCentredString(width - 5*cm, y_pos - 0.6*cm, "🔒 FIRMADO DIGITALMENTE")
-    
-    pdf.setFillColor(colors.black)
-    pdf.setFont("Helvetica", 9)
-    pdf.drawCentredString(width - 5*cm, y_pos - 1.3*cm, "Dirección de Habilitaciones")
-    pdf.drawCentredString(width - 5*cm, y_pos - 1.8*cm, "Argentina Habilitaciones")
-    
+        fecha_venc = afap_data['fecha_vencimiento']
+        if isinstance(fecha_venc, str):
+            fecha_venc = datetime.fromisoformat(fecha_venc)
+        pdf.drawString(6*cm, _Y_VENCIMIENTO, fecha_venc.strftime('%d/%m/%Y'))
+
     # Código de verificación
     pdf.setFont("Helvetica", 7)
     pdf.setFillColor(colors.grey)
     codigo_verificacion = f"VER-{afap_data['numero_afap']}-{datetime.now().strftime('%Y%m%d%H%M')}"
-    pdf.drawCentredString(width - 5*cm, y_pos - 2.5*cm, f"Código: {codigo_verificacion}")
-    
+    pdf.drawCentredString(width - 5*cm, _Y_FIRMA - 2.5*cm, f"Código: {codigo_verificacion}")
+
     # QR Code Real
     try:
         # URL para verificar el certificado
@@ -223,52 +246,156 @@ def generate_afap_certificate(afap_data):
         base_url = os.getenv('FRONTEND_URL', 'http://localhost:3000')
         verification_url = f"{base_url}/verificar-certificado/{afap_data['id']}"
         qr_buffer = generate_qr_code(verification_url)
-        
-        # Guardar temporalmente para usar con ReportLab
-        qr_path = f"/tmp/qr_{afap_data['numero_afap']}.png"
-        with open(qr_path, 'wb') as f:
-            f.write(qr_buffer.read())
-        
-        # Insertar QR en el PDF
-        pdf.drawImage(qr_path, 2*cm, 2*cm, width=3*cm, height=3*cm)
-        
-        # Label del QR
-        pdf.setFont("Helvetica-Bold", 9)
-        pdf.setFillColor(colors.black)
-        pdf.drawCentredString(3.5*cm, 1.5*cm, "Escanear para verificar")
+
+        # Insertar QR en el PDF directamente desde memoria (sin pasar por /tmp)
+        pdf.drawImage(ImageReader(qr_buffer), 2*cm, 2*cm, width=3*cm, height=3*cm)
+
+        # Identificador debajo del QR
         pdf.setFont("Helvetica", 7)
         pdf.setFillColor(colors.grey)
         pdf.drawCentredString(3.5*cm, 1.2*cm, f"AFAP-{afap_data['numero_afap']}")
-        
-        # Limpiar archivo temporal
-        if os.path.exists(qr_path):
-            os.remove(qr_path)
-            
+
     except Exception as e:
         print(f"Error generating QR code: {e}")
         # Fallback: dibujar recuadro simple
         pdf.setStrokeColor(colors.grey)
         pdf.setLineWidth(1)
         pdf.rect(2*cm, 2*cm, 3*cm, 3*cm)
-    
+
     # Footer con timestamp
     pdf.setFont("Helvetica", 8)
     pdf.setFillColor(colors.grey)
-    pdf.drawCentredString(width/2, 1.5*cm, "Argentina Habilitaciones - Sistema de Habilitaciones Digitales")
     pdf.drawCentredString(width/2, 1*cm, f"Generado el {datetime.now().strftime('%d/%m/%Y a las %H:%M:%S')} hs")
-    
-    # Número de página y validez
-    pdf.setFont("Helvetica-Bold", 7)
-    pdf.setFillColor(emerald_color)
-    pdf.drawString(2*cm, 0.5*cm, "✓ DOCUMENTO VÁLIDO")
-    pdf.setFillColor(colors.grey)
-    pdf.drawRightString(width - 2*cm, 0.5*cm, "Página 1 de 1")
-    
+
     # Finalize PDF
     pdf.save()
-    
+
     # Get the value of the BytesIO buffer
     pdf_bytes = buffer.getvalue()
     buffer.close()
-    
+
     return pdf_bytes
+
+# Motor de render seleccionable por entorno para poder comparar A/B:
+# "reportlab" (default) o "weasyprint" (HTML + CSS, layout en motor nativo)
+PDF_ENGINE = os.getenv('PDF_ENGINE', 'reportlab')
+
+_HTML_TEMPLATE = None  # plantilla Jinja2, compilada en el primer uso
+
+def _generate_certificate_weasyprint(afap_data):
+    """
+    Genera el certificado renderizando una plantilla HTML con WeasyPrint.
+    La plantilla se compila una sola vez; por llamada solo se sustituyen
+    los campos variables y el QR se incrusta como data URL.
+    """
+    import base64
+    from jinja2 import Template
+    from weasyprint import HTML
+
+    global _HTML_TEMPLATE
+    if _HTML_TEMPLATE is None:
+        _HTML_TEMPLATE = Template("""<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<style>
+  @page { size: A4; margin: 2cm; }
+  body { font-family: Helvetica, sans-serif; color: #000; }
+  h1 { color: #0F172A; text-align: center; font-size: 20px; margin-bottom: 0; }
+  .subtitulo { text-align: center; font-size: 12px; border-bottom: 2px solid #2563EB; padding-bottom: 8px; }
+  h2 { color: #2563EB; text-align: center; font-size: 18px; }
+  .badge { background: #10B981; color: #fff; font-weight: bold; text-align: center;
+           width: 40%; margin: 0 auto; padding: 6px; border-radius: 8px; }
+  .estado { color: #10B981; font-weight: bold; text-align: center; font-size: 10px; }
+  table { font-size: 11px; margin-top: 16px; }
+  td.label { font-weight: bold; padding-right: 16px; }
+  .legal { font-size: 9px; margin-top: 16px; }
+  .firma { border: 1px solid #000; width: 45%; float: right; text-align: center;
+           font-size: 9px; padding: 8px; }
+  .firma .sello { background: #2563EB; color: #fff; font-weight: bold; font-size: 8px;
+                  padding: 4px; border-radius: 4px; }
+  .qr { width: 3cm; height: 3cm; }
+  .footer { font-size: 8px; color: #777; text-align: center; margin-top: 24px; clear: both; }
+</style>
+</head>
+<body>
+  <h1>ARGENTINA HABILITACIONES</h1>
+  <div class="subtitulo">Dirección de Habilitaciones Comerciales</div>
+  <h2>AUTORIZACIÓN DE FUNCIONAMIENTO AUTOMÁTICO PRECARIA (AFAP)</h2>
+  <div class="badge">N° {{ numero_afap }}</div>
+  <div class="estado">✓ APROBADO</div>
+  <table>
+    <tr><td class="label">TITULAR:</td><td>{{ titular_nombre }}</td></tr>
+    <tr><td class="label">CUIT/CUIL:</td><td>{{ titular_cuit }}</td></tr>
+    <tr><td class="label">DOMICILIO DEL COMERCIO:</td><td>{{ domicilio }}, {{ localidad }}</td></tr>
+    <tr><td class="label">RUBRO:</td><td>{{ rubro_tipo }}</td></tr>
+    <tr><td class="label">ACTIVIDAD:</td><td>{{ descripcion }}</td></tr>
+    <tr><td class="label">SUPERFICIE:</td><td>{{ metros_cuadrados }} m²</td></tr>
+    <tr><td class="label">FECHA DE EMISIÓN:</td><td>{{ fecha_emision }}</td></tr>
+    <tr><td class="label">FECHA DE VENCIMIENTO:</td><td>{{ fecha_vencimiento }}</td></tr>
+  </table>
+  <div class="legal">
+    <b>IMPORTANTE:</b>
+    <ul>
+    {% for linea in texto_legal %}<li>{{ linea }}</li>{% endfor %}
+    </ul>
+  </div>
+  <div class="firma">
+    <div class="sello">🔒 FIRMADO DIGITALMENTE</div>
+    Dirección de Habilitaciones<br>Argentina Habilitaciones<br>
+    <span style="color:#777">Código: {{ codigo_verificacion }}</span>
+  </div>
+  <div>
+    <img class="qr" src="data:image/png;base64,{{ qr_b64 }}"><br>
+    <b style="font-size:9px">Escanear para verificar</b>
+  </div>
+  <div class="footer">
+    Argentina Habilitaciones - Sistema de Habilitaciones Digitales<br>
+    Generado el {{ generado }} hs
+  </div>
+</body>
+</html>""")
+
+    domicilio = f"{afap_data.get('domicilio_calle', '')} {afap_data.get('domicilio_altura', '')}"
+    if afap_data.get('domicilio_piso'):
+        domicilio += f", Piso {afap_data['domicilio_piso']}"
+    if afap_data.get('domicilio_depto'):
+        domicilio += f", Depto {afap_data['domicilio_depto']}"
+    if afap_data.get('domicilio_local'):
+        domicilio += f", Local {afap_data['domicilio_local']}"
+
+    fecha_emision = afap_data.get('fecha_solicitud') or datetime.now()
+    if isinstance(fecha_emision, str):
+        fecha_emision = datetime.fromisoformat(fecha_emision)
+    fecha_venc = afap_data.get('fecha_vencimiento')
+    if isinstance(fecha_venc, str):
+        fecha_venc = datetime.fromisoformat(fecha_venc)
+
+    base_url = os.getenv('FRONTEND_URL', 'http://localhost:3000')
+    verification_url = f"{base_url}/verificar-certificado/{afap_data['id']}"
+
+    html = _HTML_TEMPLATE.render(
+        numero_afap=afap_data['numero_afap'],
+        titular_nombre=afap_data.get('titular_nombre', ''),
+        titular_cuit=afap_data.get('titular_cuit', ''),
+        domicilio=domicilio,
+        localidad=afap_data.get('domicilio_localidad', 'Argentina'),
+        rubro_tipo=afap_data.get('rubro_tipo', ''),
+        descripcion=afap_data.get('rubro_descripcion', ''),
+        metros_cuadrados=afap_data.get('metros_cuadrados', ''),
+        fecha_emision=fecha_emision.strftime('%d/%m/%Y'),
+        fecha_vencimiento=fecha_venc.strftime('%d/%m/%Y') if fecha_venc else '',
+        texto_legal=[linea.lstrip('• ') for linea in TEXTO_LEGAL],
+        codigo_verificacion=f"VER-{afap_data['numero_afap']}-{datetime.now().strftime('%Y%m%d%H%M')}",
+        qr_b64=base64.b64encode(_qr_png_bytes(verification_url)).decode('ascii'),
+        generado=datetime.now().strftime('%d/%m/%Y a las %H:%M:%S'),
+    )
+    return HTML(string=html).write_pdf()
+
+def generate_afap_certificate(afap_data):
+    """
+    Genera un certificado AFAP en PDF con QR Code, Watermark y Firma Digital
+    """
+    if PDF_ENGINE == 'weasyprint':
+        return _generate_certificate_weasyprint(afap_data)
+    return _generate_certificate_reportlab(afap_data)
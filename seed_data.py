@@ -1,231 +1,349 @@
 import asyncio
 import os
-from motor.motor_asyncio import AsyncIOMotorClient
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pymongo import AsyncMongoClient, InsertOne, WriteConcern
 from datetime import datetime, timedelta, timezone
 from auth import get_password_hash
 
-async def seed_database():
-    mongo_url = os.getenv("MONGO_URL", "mongodb://localhost:27017")
-    db_name = os.getenv("DB_NAME", "buenosaires_permits")
-    
-    client = AsyncIOMotorClient(mongo_url)
-    db = client[db_name]
-    
-    # Clear existing data
-    await db.users.delete_many({})
-    await db.afap.delete_many({})
-    await db.inspecciones.delete_many({})
-    await db.chat_messages.delete_many({})
-    
-    print("Creando usuarios de demo...")
-    
-    # Create demo users
+# ============ FIXTURES ESTÁTICAS ============
+# La parte fija de cada documento se construye una sola vez al importar el
+# módulo; seed_database solo parchea por corrida los campos dinámicos
+# (hash de contraseña y fechas) con un dict-unpacking (copia a nivel C).
+
+_USER_TEMPLATES = (
+    {
+        "id": "user-1",
+        "email": "ciudadano@argentina.gob.ar",
+        "cuit_cuil": "20123456789",
+        "nombre": "Juan",
+        "apellido": "Pérez",
+        "telefono": "+54 11 1234-5678",
+        "role": "ciudadano",
+    },
+    {
+        "id": "user-2",
+        "email": "inspector@argentina.gob.ar",
+        "cuit_cuil": "20987654321",
+        "nombre": "María",
+        "apellido": "González",
+        "telefono": "+54 11 9876-5432",
+        "role": "inspector",
+    },
+    {
+        "id": "user-3",
+        "email": "admin@argentina.gob.ar",
+        "cuit_cuil": "20555555555",
+        "nombre": "Carlos",
+        "apellido": "Rodríguez",
+        "telefono": "+54 11 5555-5555",
+        "role": "administrador",
+    },
+    {
+        "id": "user-4",
+        "email": "comerciante@email.com",
+        "cuit_cuil": "20111222333",
+        "nombre": "Ana",
+        "apellido": "Martínez",
+        "telefono": "+54 11 1112-2233",
+        "role": "ciudadano",
+    },
+)
+
+# Valores categóricos que se repiten en varias fixtures: internados
+# explícitamente para que todas las filas compartan el mismo objeto str
+# (menos RAM y mejor localidad cuando el encoder BSON los recorre)
+_RUBRO_MINORISTA = sys.intern("Comercio Minorista")
+_LOCALIDAD = sys.intern("Buenos Aires")
+
+# Layout columnar (SoA): una tupla de claves compartida y una fila de valores
+# por AFAP; los dicts se arman una sola vez al importar vía zip a nivel C.
+# Mucho más compacto que repetir ~40 claves por registro.
+_AFAP_KEYS = (
+    'id', 'numero_afap', 'user_id', 'estado',
+    'solicitante_nombre', 'solicitante_apellido', 'solicitante_cuit_cuil', 'solicitante_telefono',
+    'solicitante_email', 'titular_tipo', 'titular_nombre', 'titular_cuit',
+    'cuenta_abl', 'domicilio_calle', 'domicilio_altura', 'domicilio_piso',
+    'domicilio_depto', 'domicilio_local', 'domicilio_localidad', 'rubro_tipo',
+    'rubro_subrubro', 'rubro_descripcion', 'metros_cuadrados', 'techos_cielorasos',
+    'pisos_material', 'tiene_sanitarios', 'sanitarios_acceso_directo', 'sanitarios_antecamara',
+    'sanitarios_lavabos_m', 'sanitarios_retretes_m', 'sanitarios_lavabos_f', 'sanitarios_retretes_f',
+    'sanitarios_migitorios', 'sanitarios_discapacitados', 'cantidad_trabajadores', 'documentos_urls',
+    'observaciones', 'inspector_asignado',
+)
+
+_AFAP_ROWS = (
+    (
+        'afap-1', 1001, 'user-1',
+        'aprobado', 'Juan', 'Pérez',
+        '20123456789', '+54 11 1234-5678', 'ciudadano@buenosaires.gov',
+        'fisica', 'Juan Pérez', '20123456789',
+        '12345678', 'Av. Evergreen Terrace', '742',
+        None, None, 'PB',
+        _LOCALIDAD, _RUBRO_MINORISTA, 'Panadería y Confitería',
+        'Panadería artesanal con venta de productos de pastelería', 85.5, 'Cielorraso de yeso',
+        'Cerámico antideslizante', True, True,
+        True, 1, 1,
+        1, 1, 1,
+        True, 3, [],
+        'Aprobado - Cumple con todos los requisitos', 'user-2',
+    ),
+    (
+        'afap-2', 1002, 'user-4',
+        'pendiente', 'Ana', 'Martínez',
+        '20111222333', '+54 11 1112-2233', 'comerciante@email.com',
+        'fisica', 'Ana Martínez', '20111222333',
+        '87654321', 'Boulevard Principal', '1234',
+        None, None, 'Local 2',
+        _LOCALIDAD, _RUBRO_MINORISTA, 'Indumentaria y Accesorios',
+        'Boutique de ropa y accesorios para damas', 120.0, 'Losa de hormigón armado',
+        'Porcelanato', True, True,
+        False, 1, 1,
+        1, 1, 0,
+        False, 2, [],
+        None, None,
+    ),
+    (
+        'afap-3', 1003, 'user-1',
+        'inspeccion', 'Juan', 'Pérez',
+        '20123456789', '+54 11 1234-5678', 'ciudadano@buenosaires.gov',
+        'juridica', 'Cafetería La Esquina SRL', '30123456789',
+        '11223344', 'Calle Principal', '999',
+        None, None, 'Esquina',
+        _LOCALIDAD, 'Gastronomía', 'Cafetería y Bar',
+        'Cafetería con servicio de desayunos y meriendas', 95.0, 'Cielorraso suspendido',
+        'Cerámico', True, True,
+        True, 1, 1,
+        1, 1, 1,
+        True, 4, [],
+        'Programada inspección para verificar condiciones de seguridad', 'user-2',
+    ),
+)
+
+_AFAP_TEMPLATES = tuple(dict(zip(_AFAP_KEYS, row)) for row in _AFAP_ROWS)
+
+# El contador de números de AFAP se arrastra hasta acá tras el seed
+_MAX_SEED_NUMERO_AFAP = max(tpl["numero_afap"] for tpl in _AFAP_TEMPLATES)
+
+# Offsets en días de (fecha_solicitud, fecha_vencimiento) por AFAP
+_AFAP_DATE_OFFSETS = {
+    "afap-1": (-5, 25),
+    "afap-2": (-2, 28),
+    "afap-3": (-10, 20),
+}
+
+_INSPECCION_TEMPLATES = (
+    {
+        "id": "insp-1",
+        "afap_id": "afap-3",
+        "inspector_id": "user-2",
+        "estado": "programada",
+        "fecha_realizada": None,
+        "observaciones": "Verificar instalaciones eléctricas y salidas de emergencia",
+        "resultado": None,
+        "notas": None,
+    },
+)
+
+# Offset en días de fecha_programada por inspección
+_INSPECCION_DATE_OFFSETS = {
+    "insp-1": 3,
+}
+
+# Documentos ya codificados a BSON, reusados entre corridas del mismo proceso
+# (p. ej. /seed repetido en desarrollo): el encode Python->BSON es el costo de
+# CPU dominante del insert masivo y solo hace falta pagarlo una vez. Las fechas
+# quedan congeladas en la primera corrida del proceso, aceptable para fixtures.
+_raw_seed_cache = None
+
+def _encode_raw(users, afaps, inspecciones):
+    from bson import encode
+    from bson.raw_bson import RawBSONDocument
+
+    global _raw_seed_cache
+    if _raw_seed_cache is None:
+        _raw_seed_cache = (
+            [RawBSONDocument(encode(d)) for d in users],
+            [RawBSONDocument(encode(d)) for d in afaps],
+            [RawBSONDocument(encode(d)) for d in inspecciones],
+        )
+    return _raw_seed_cache
+
+async def _bulk_insert(coll, docs, chunk=100, bypass_validation=True):
+    """
+    bulk_write de InsertOne en tajadas de ~100 documentos lanzadas en
+    paralelo: para documentos chicos el throughput de Mongo se aplana cerca
+    de batch=50-100, las tajadas concurrentes solapan el RTT con el trabajo
+    del servidor, y la API de bulk_write permite mezclar otras operaciones
+    si el seed algún día las necesita. Con el seed actual (<100 docs)
+    degenera en un único batch por colección.
+    """
+    ops = [InsertOne(d) for d in docs]
+    await asyncio.gather(*[
+        coll.bulk_write(ops[i:i + chunk], ordered=False, bypass_document_validation=bypass_validation)
+        for i in range(0, len(ops), chunk)
+    ])
+
+# Carga opcional desde .bson pre-serializados (SEED_BSON_DIR): se saltea por
+# completo la construcción de dicts, el KDF y el encode Python->BSON; los
+# bytes van del disco al wire. Generarlos con: python seed_data.py --dump-bson
+_SEED_BSON_COLLECTIONS = ("users", "afap", "inspecciones")
+
+def _load_seed_bson(dirpath):
+    from bson import decode_all
+    from bson.codec_options import CodecOptions
+    from bson.raw_bson import RawBSONDocument
+
+    opts = CodecOptions(document_class=RawBSONDocument)
+    out = {}
+    for name in _SEED_BSON_COLLECTIONS:
+        with open(os.path.join(dirpath, f"{name}.bson"), "rb") as f:
+            out[name] = decode_all(f.read(), opts)
+    return out
+
+async def dump_seed_bson(dirpath):
+    """
+    Serializa las fixtures a un .bson por colección (formato concatenado,
+    estilo mongodump). El hash y las fechas quedan congelados al momento del
+    dump, aceptable para fixtures de desarrollo.
+    """
+    from bson import encode
+
+    now = datetime.now(timezone.utc)
+    demo_password_hash = (await hash_passwords(["demo123"]))[0]
+    users, afaps, inspecciones = _build_seed_docs(now, demo_password_hash)
+
+    os.makedirs(dirpath, exist_ok=True)
+    for name, docs in zip(_SEED_BSON_COLLECTIONS, (users, afaps, inspecciones)):
+        with open(os.path.join(dirpath, f"{name}.bson"), "wb") as f:
+            for doc in docs:
+                f.write(encode(doc))
+    print(f"✓ Fixtures serializadas a {dirpath}/")
+
+def _build_seed_docs(now, demo_password_hash):
+    # Los offsets distintos se materializan una sola vez por corrida
+    fechas = {
+        dias: now + timedelta(days=dias)
+        for offsets in _AFAP_DATE_OFFSETS.values() for dias in offsets
+    }
+    fechas.update({
+        dias: now + timedelta(days=dias)
+        for dias in _INSPECCION_DATE_OFFSETS.values()
+    })
+
     users = [
-        {
-            "id": "user-1",
-            "email": "ciudadano@argentina.gob.ar",
-            "cuit_cuil": "20123456789",
-            "nombre": "Juan",
-            "apellido": "Pérez",
-            "telefono": "+54 11 1234-5678",
-            "role": "ciudadano",
-            "hashed_password": get_password_hash("demo123"),
-            "created_at": datetime.now(timezone.utc).isoformat()
-        },
-        {
-            "id": "user-2",
-            "email": "inspector@argentina.gob.ar",
-            "cuit_cuil": "20987654321",
-            "nombre": "María",
-            "apellido": "González",
-            "telefono": "+54 11 9876-5432",
-            "role": "inspector",
-            "hashed_password": get_password_hash("demo123"),
-            "created_at": datetime.now(timezone.utc).isoformat()
-        },
-        {
-            "id": "user-3",
-            "email": "admin@argentina.gob.ar",
-            "cuit_cuil": "20555555555",
-            "nombre": "Carlos",
-            "apellido": "Rodríguez",
-            "telefono": "+54 11 5555-5555",
-            "role": "administrador",
-            "hashed_password": get_password_hash("demo123"),
-            "created_at": datetime.now(timezone.utc).isoformat()
-        },
-        {
-            "id": "user-4",
-            "email": "comerciante@email.com",
-            "cuit_cuil": "20111222333",
-            "nombre": "Ana",
-            "apellido": "Martínez",
-            "telefono": "+54 11 1112-2233",
-            "role": "ciudadano",
-            "hashed_password": get_password_hash("demo123"),
-            "created_at": datetime.now(timezone.utc).isoformat()
-        }
+        {**tpl, "hashed_password": demo_password_hash, "created_at": now}
+        for tpl in _USER_TEMPLATES
     ]
-    
-    await db.users.insert_many(users)
-    print(f"✓ {len(users)} usuarios creados")
-    
-    print("Creando solicitudes de Habilitación Precaria de demo...")
-    
-    # Create demo AFAPs
     afaps = [
         {
-            "id": "afap-1",
-            "numero_afap": 1001,
-            "user_id": "user-1",
-            "estado": "aprobado",
-            "solicitante_nombre": "Juan",
-            "solicitante_apellido": "Pérez",
-            "solicitante_cuit_cuil": "20123456789",
-            "solicitante_telefono": "+54 11 1234-5678",
-            "solicitante_email": "ciudadano@buenosaires.gov",
-            "titular_tipo": "fisica",
-            "titular_nombre": "Juan Pérez",
-            "titular_cuit": "20123456789",
-            "cuenta_abl": "12345678",
-            "domicilio_calle": "Av. Evergreen Terrace",
-            "domicilio_altura": "742",
-            "domicilio_piso": None,
-            "domicilio_depto": None,
-            "domicilio_local": "PB",
-            "domicilio_localidad": "Buenos Aires",
-            "rubro_tipo": "Comercio Minorista",
-            "rubro_subrubro": "Panadería y Confitería",
-            "rubro_descripcion": "Panadería artesanal con venta de productos de pastelería",
-            "metros_cuadrados": 85.5,
-            "techos_cielorasos": "Cielorraso de yeso",
-            "pisos_material": "Cerámico antideslizante",
-            "tiene_sanitarios": True,
-            "sanitarios_acceso_directo": True,
-            "sanitarios_antecamara": True,
-            "sanitarios_lavabos_m": 1,
-            "sanitarios_retretes_m": 1,
-            "sanitarios_lavabos_f": 1,
-            "sanitarios_retretes_f": 1,
-            "sanitarios_migitorios": 1,
-            "sanitarios_discapacitados": True,
-            "cantidad_trabajadores": 3,
-            "documentos_urls": [],
-            "fecha_solicitud": (datetime.now(timezone.utc) - timedelta(days=5)).isoformat(),
-            "fecha_vencimiento": (datetime.now(timezone.utc) + timedelta(days=25)).isoformat(),
-            "observaciones": "Aprobado - Cumple con todos los requisitos",
-            "inspector_asignado": "user-2"
-        },
-        {
-            "id": "afap-2",
-            "numero_afap": 1002,
-            "user_id": "user-4",
-            "estado": "pendiente",
-            "solicitante_nombre": "Ana",
-            "solicitante_apellido": "Martínez",
-            "solicitante_cuit_cuil": "20111222333",
-            "solicitante_telefono": "+54 11 1112-2233",
-            "solicitante_email": "comerciante@email.com",
-            "titular_tipo": "fisica",
-            "titular_nombre": "Ana Martínez",
-            "titular_cuit": "20111222333",
-            "cuenta_abl": "87654321",
-            "domicilio_calle": "Boulevard Principal",
-            "domicilio_altura": "1234",
-            "domicilio_piso": None,
-            "domicilio_depto": None,
-            "domicilio_local": "Local 2",
-            "domicilio_localidad": "Buenos Aires",
-            "rubro_tipo": "Comercio Minorista",
-            "rubro_subrubro": "Indumentaria y Accesorios",
-            "rubro_descripcion": "Boutique de ropa y accesorios para damas",
-            "metros_cuadrados": 120.0,
-            "techos_cielorasos": "Losa de hormigón armado",
-            "pisos_material": "Porcelanato",
-            "tiene_sanitarios": True,
-            "sanitarios_acceso_directo": True,
-            "sanitarios_antecamara": False,
-            "sanitarios_lavabos_m": 1,
-            "sanitarios_retretes_m": 1,
-            "sanitarios_lavabos_f": 1,
-            "sanitarios_retretes_f": 1,
-            "sanitarios_migitorios": 0,
-            "sanitarios_discapacitados": False,
-            "cantidad_trabajadores": 2,
-            "documentos_urls": [],
-            "fecha_solicitud": (datetime.now(timezone.utc) - timedelta(days=2)).isoformat(),
-            "fecha_vencimiento": (datetime.now(timezone.utc) + timedelta(days=28)).isoformat(),
-            "observaciones": None,
-            "inspector_asignado": None
-        },
-        {
-            "id": "afap-3",
-            "numero_afap": 1003,
-            "user_id": "user-1",
-            "estado": "inspeccion",
-            "solicitante_nombre": "Juan",
-            "solicitante_apellido": "Pérez",
-            "solicitante_cuit_cuil": "20123456789",
-            "solicitante_telefono": "+54 11 1234-5678",
-            "solicitante_email": "ciudadano@buenosaires.gov",
-            "titular_tipo": "juridica",
-            "titular_nombre": "Cafetería La Esquina SRL",
-            "titular_cuit": "30123456789",
-            "cuenta_abl": "11223344",
-            "domicilio_calle": "Calle Principal",
-            "domicilio_altura": "999",
-            "domicilio_piso": None,
-            "domicilio_depto": None,
-            "domicilio_local": "Esquina",
-            "domicilio_localidad": "Buenos Aires",
-            "rubro_tipo": "Gastronomía",
-            "rubro_subrubro": "Cafetería y Bar",
-            "rubro_descripcion": "Cafetería con servicio de desayunos y meriendas",
-            "metros_cuadrados": 95.0,
-            "techos_cielorasos": "Cielorraso suspendido",
-            "pisos_material": "Cerámico",
-            "tiene_sanitarios": True,
-            "sanitarios_acceso_directo": True,
-            "sanitarios_antecamara": True,
-            "sanitarios_lavabos_m": 1,
-            "sanitarios_retretes_m": 1,
-            "sanitarios_lavabos_f": 1,
-            "sanitarios_retretes_f": 1,
-            "sanitarios_migitorios": 1,
-            "sanitarios_discapacitados": True,
-            "cantidad_trabajadores": 4,
-            "documentos_urls": [],
-            "fecha_solicitud": (datetime.now(timezone.utc) - timedelta(days=10)).isoformat(),
-            "fecha_vencimiento": (datetime.now(timezone.utc) + timedelta(days=20)).isoformat(),
-            "observaciones": "Programada inspección para verificar condiciones de seguridad",
-            "inspector_asignado": "user-2"
+            **tpl,
+            "fecha_solicitud": fechas[_AFAP_DATE_OFFSETS[tpl["id"]][0]],
+            "fecha_vencimiento": fechas[_AFAP_DATE_OFFSETS[tpl["id"]][1]],
         }
+        for tpl in _AFAP_TEMPLATES
     ]
-    
-    await db.afap.insert_many(afaps)
-    print(f"✓ {len(afaps)} solicitudes de Habilitación Precaria creadas")
-    
-    print("Creando inspecciones de demo...")
-    
-    # Create demo inspections
     inspecciones = [
         {
-            "id": "insp-1",
-            "afap_id": "afap-3",
-            "inspector_id": "user-2",
-            "estado": "programada",
-            "fecha_programada": (datetime.now(timezone.utc) + timedelta(days=3)).isoformat(),
-            "fecha_realizada": None,
-            "observaciones": "Verificar instalaciones eléctricas y salidas de emergencia",
-            "resultado": None,
-            "notas": None,
-            "created_at": datetime.now(timezone.utc).isoformat()
+            **tpl,
+            "fecha_programada": fechas[_INSPECCION_DATE_OFFSETS[tpl["id"]]],
+            "created_at": now,
         }
+        for tpl in _INSPECCION_TEMPLATES
     ]
-    
-    await db.inspecciones.insert_many(inspecciones)
-    print(f"✓ {len(inspecciones)} inspecciones creadas")
-    
+    return users, afaps, inspecciones
+
+async def hash_passwords(passwords):
+    """
+    Hashea una lista de contraseñas en paralelo sobre todos los cores.
+    Deduplica primero (el seed de demo usa una sola contraseña compartida,
+    así que paga un único KDF); con varias distintas reparte el trabajo en
+    un pool de procesos, ya que el KDF es CPU puro y escala ~N cores.
+    """
+    distinct = list(dict.fromkeys(passwords))
+    if len(distinct) == 1:
+        hashes = {distinct[0]: await asyncio.to_thread(get_password_hash, distinct[0])}
+    else:
+        loop = asyncio.get_running_loop()
+        with ProcessPoolExecutor() as executor:
+            results = await asyncio.gather(
+                *[loop.run_in_executor(executor, get_password_hash, p) for p in distinct]
+            )
+        hashes = dict(zip(distinct, results))
+    return [hashes[p] for p in passwords]
+
+async def seed_database(db=None):
+    # Permite reusar la conexión del server (endpoint /seed) o abrir una
+    # propia cuando se corre como script
+    client = None
+    if db is None:
+        mongo_url = os.getenv("MONGO_URL", "mongodb://localhost:27017")
+        db_name = os.getenv("DB_NAME", "buenosaires_permits")
+
+        client = AsyncMongoClient(mongo_url, compressors="zstd,zlib", zlibCompressionLevel=3)
+        db = client[db_name]
+
+    # Clear existing data (las cuatro colecciones en paralelo: se paga un solo RTT)
+    await asyncio.gather(
+        db.users.delete_many({}),
+        db.afap.delete_many({}),
+        db.inspecciones.delete_many({}),
+        db.chat_messages.delete_many({}),
+    )
+
+    print("Creando usuarios de demo...")
+
+    bson_dir = os.getenv("SEED_BSON_DIR")
+    if bson_dir and all(
+        os.path.exists(os.path.join(bson_dir, f"{n}.bson")) for n in _SEED_BSON_COLLECTIONS
+    ):
+        # Camino rápido: fixtures pre-serializadas, sin KDF ni encode
+        raw = _load_seed_bson(bson_dir)
+        raw_users, raw_afaps, raw_inspecciones = (
+            raw["users"], raw["afap"], raw["inspecciones"]
+        )
+    else:
+        # Los cuatro usuarios de demo comparten contraseña: hash_passwords la
+        # deduplica y paga un solo KDF (y escala a todos los cores si algún
+        # día el seed crece con contraseñas distintas)
+        now = datetime.now(timezone.utc)
+        demo_password_hash = (await hash_passwords(["demo123"]))[0]
+        users, afaps, inspecciones = _build_seed_docs(now, demo_password_hash)
+        raw_users, raw_afaps, raw_inspecciones = _encode_raw(users, afaps, inspecciones)
+
+    # Insertar las tres colecciones concurrentemente, cada una en batches
+    # chunked sin orden ni validación (son fixtures conocidas, no input de
+    # usuarios); los documentos van pre-codificados a BSON.
+    # SEED_FAST_MODE=1 usa w=0 (fire-and-forget): se ahorra el RTT de ack por
+    # batch, útil para poblar entornos de prueba descartables. pymongo no
+    # permite bypass_document_validation con escrituras no reconocidas, así
+    # que en ese modo la validación va por el camino normal.
+    fast_mode = os.getenv("SEED_FAST_MODE", "").lower() in ("1", "true")
+    if fast_mode:
+        w0 = WriteConcern(w=0)
+        users_coll = db.users.with_options(write_concern=w0)
+        afap_coll = db.afap.with_options(write_concern=w0)
+        inspecciones_coll = db.inspecciones.with_options(write_concern=w0)
+    else:
+        users_coll, afap_coll, inspecciones_coll = db.users, db.afap, db.inspecciones
+
+    await asyncio.gather(
+        _bulk_insert(users_coll, raw_users, bypass_validation=not fast_mode),
+        _bulk_insert(afap_coll, raw_afaps, bypass_validation=not fast_mode),
+        _bulk_insert(inspecciones_coll, raw_inspecciones, bypass_validation=not fast_mode),
+    )
+    # Sincronizar el contador atómico con las fixtures: sin esto el primer
+    # POST /api/afap después del seed emitiría 1001, duplicando afap-1
+    await db.counters.update_one(
+        {"_id": "afap"},
+        {"$max": {"seq": _MAX_SEED_NUMERO_AFAP}},
+        upsert=True
+    )
+
+    print(f"✓ {len(raw_users)} usuarios creados")
+    print(f"✓ {len(raw_afaps)} solicitudes de Habilitación Precaria creadas")
+    print(f"✓ {len(raw_inspecciones)} inspecciones creadas")
+
     print("\n✅ Base de datos poblada con datos de demostración")
     print("\nCredenciales de acceso:")
     print("\nCiudadano:")
@@ -237,10 +355,22 @@ async def seed_database():
     print("\nAdministrador:")
     print("  CUIT/CUIL: 20555555555")
     print("  Contraseña: demo123")
-    
-    client.close()
+
+    if client is not None:
+        await client.close()
+
+    return {
+        "users_created": len(raw_users),
+        "afaps_created": len(raw_afaps),
+        "inspecciones_created": len(raw_inspecciones),
+    }
 
 if __name__ == "__main__":
     from dotenv import load_dotenv
     load_dotenv()
-    asyncio.run(seed_database())
\ No newline at end of file
+    if "--dump-bson" in sys.argv:
+        idx = sys.argv.index("--dump-bson")
+        target = sys.argv[idx + 1] if len(sys.argv) > idx + 1 else "seed_bson"
+        asyncio.run(dump_seed_bson(target))
+    else:
+        asyncio.run(seed_database())
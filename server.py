@@ -1,15 +1,21 @@
-from fastapi import FastAPI, APIRouter, Depends, HTTPException, status, UploadFile, File
-from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi import BackgroundTasks, FastAPI, APIRouter, Depends, HTTPException, Query, Request, Response, status, UploadFile, File
+from fastapi.responses import JSONResponse, ORJSONResponse, StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
+from gridfs import AsyncGridFSBucket
+from pymongo import AsyncMongoClient, ReturnDocument
+import asyncio
+import hashlib
+import orjson
 import os
 import logging
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from datetime import datetime, timedelta, timezone
 from typing import List, Optional
-import base64
 from io import BytesIO
 
 from models import (
@@ -19,27 +25,73 @@ from models import (
 )
 from auth import (
     get_password_hash, authenticate_user, create_access_token,
-    get_current_user, ACCESS_TOKEN_EXPIRE_MINUTES, security
+    ACCESS_TOKEN_EXPIRE_MINUTES, security
 )
 
+# Precalculado una vez: login/register lo usan en cada llamada
+ACCESS_TOKEN_EXPIRES = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+
+import httpx
 from openai import AsyncOpenAI
 from pdf_generator import generate_afap_certificate
 from email_service import send_certificate_email, send_status_notification
 
+# uvloop (libuv) reemplaza el scheduling puro-Python de asyncio; red de
+# seguridad por si uvicorn no se lanzó con --loop uvloop
+try:
+    import uvloop
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+except ImportError:
+    pass
+
+# El render de certificados con ReportLab es CPU-bound puro: se despacha a un
+# pool de procesos para no bloquear el event loop (y escapar del GIL)
+_pdf_pool = ProcessPoolExecutor(max_workers=os.cpu_count())
+
+# Certificados ya renderizados, clave (afap_id, estado, observaciones): la
+# segunda descarga del mismo documento es un stream de bytes O(1)
+_PDF_CACHE_MAX = 128
+_pdf_cache: dict = {}
+
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
 # MongoDB connection
+# minPoolSize evita que el primer request pague la conexión fría; el timeout
+# corto hace que un Mongo caído falle rápido en lugar de colgar 30s
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = AsyncMongoClient(
+    mongo_url,
+    minPoolSize=5,
+    maxPoolSize=50,
+    serverSelectionTimeoutMS=2000,
+    # Compresión de wire negociada con el servidor: para documentos con mucho
+    # texto reduce los bytes en tránsito a ~la mitad en despliegues remotos
+    # (zstd vía zstandard; zlib como fallback sin dependencias nativas)
+    compressors="zstd,zlib",
+    zlibCompressionLevel=3,
+)
 db = client[os.environ['DB_NAME']]
+fs_bucket = AsyncGridFSBucket(db)
 
 # LLM Setup - OpenAI
+# Pool de conexiones acotado con keepalive y HTTP/2: bajo tráfico de chat
+# concurrente se multiplexan varias llamadas por conexión TCP en lugar de
+# pagar un handshake TLS (~100ms) por cada una
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-openai_client = AsyncOpenAI(api_key=OPENAI_API_KEY) if OPENAI_API_KEY else None
+openai_client = AsyncOpenAI(
+    api_key=OPENAI_API_KEY,
+    http_client=httpx.AsyncClient(
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=50, keepalive_expiry=30),
+        timeout=httpx.Timeout(30.0, connect=5.0),
+        http2=True,
+    ),
+) if OPENAI_API_KEY else None
 
 # Create the main app
-app = FastAPI(title="Argentina Habilitaciones API")
+# orjson (C/SIMD) como serializador por defecto de todas las respuestas:
+# varias veces más rápido que json.dumps y con soporte nativo de datetime
+app = FastAPI(title="Argentina Habilitaciones API", default_response_class=ORJSONResponse)
 api_router = APIRouter(prefix="/api")
 
 # Configure logging
@@ -49,7 +101,33 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Errores 500 genéricos pre-instanciados: el path de error no aloca nada y
+# nunca filtra detalles internos de la excepción al cliente
+_CERT_ERROR = HTTPException(status_code=500, detail="Error al generar el certificado")
+_UPLOAD_ERROR = HTTPException(status_code=500, detail="Error al subir el archivo")
+_SEED_ERROR = HTTPException(status_code=500, detail="Error al poblar la base de datos")
+_VERIFY_ERROR = HTTPException(status_code=500, detail="Error al verificar el certificado")
+
+# Las tareas fire-and-forget necesitan una referencia fuerte hasta terminar:
+# el event loop solo guarda una débil y el GC puede cancelarlas en vuelo
+_background_writes: set = set()
+
+def _on_write_done(task):
+    _background_writes.discard(task)
+    # Consumir la excepción acá: si no, una escritura fallida solo aparece
+    # como ruido "Task exception was never retrieved" recién cuando el GC pasa
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("Background write failed: %s", task.exception())
+
+def _spawn_write(coro):
+    task = asyncio.create_task(coro)
+    _background_writes.add(task)
+    task.add_done_callback(_on_write_done)
+    return task
+
 # Dependency for getting current user
+# El cacheo de tokens validados vive en auth.get_current_user (TTL de 60s
+# sobre la firma del JWT): acá no se duplica esa capa
 async def get_current_user_dependency(credentials: HTTPAuthorizationCredentials = Depends(security)):
     from auth import get_current_user as _get_current_user
     return await _get_current_user(credentials, db)
@@ -67,22 +145,20 @@ async def register(user_data: UserCreate):
     if existing_email:
         raise HTTPException(status_code=400, detail="El email ya está registrado")
     
-    # Create user
-    hashed_password = get_password_hash(user_data.password)
+    # Create user (el KDF es CPU-bound: se corre en un thread para no frenar el loop)
+    hashed_password = await asyncio.to_thread(get_password_hash, user_data.password)
     user_in_db = UserInDB(
         **user_data.model_dump(exclude={"password"}),
         hashed_password=hashed_password
     )
     
     user_dict = user_in_db.model_dump()
-    user_dict['created_at'] = user_dict['created_at'].isoformat()
     
     await db.users.insert_one(user_dict)
     
     # Create access token
-    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user_in_db.cuit_cuil}, expires_delta=access_token_expires
+        data={"sub": user_in_db.cuit_cuil}, expires_delta=ACCESS_TOKEN_EXPIRES
     )
     
     user = User(**user_in_db.model_dump(exclude={"hashed_password"}))
@@ -99,9 +175,8 @@ async def login(login_data: LoginRequest):
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.cuit_cuil}, expires_delta=access_token_expires
+        data={"sub": user.cuit_cuil}, expires_delta=ACCESS_TOKEN_EXPIRES
     )
     
     user_response = User(**user.model_dump(exclude={"hashed_password"}))
@@ -114,14 +189,34 @@ async def get_me(current_user: User = Depends(get_current_user_dependency)):
 
 # ============ AFAP ENDPOINTS ============
 
+async def _aggregate_list(coll, pipeline, length=None):
+    # En la API async nativa de PyMongo, aggregate() es una corrutina que
+    # devuelve el cursor (a diferencia de Motor)
+    cursor = await coll.aggregate(pipeline)
+    return await cursor.to_list(length)
+
+async def _get_afap(afap_id: str, projection: dict):
+    """
+    Lookup único de AFAP por id con proyección explícita por caller: cada
+    endpoint decodifica solo los campos que realmente usa (documentos_urls
+    puede ser pesado y casi nadie lo necesita).
+    """
+    return await db.afap.find_one({"id": afap_id}, projection)
+
 @api_router.post("/afap", response_model=AFAP)
 async def create_afap(
     afap_data: AFAPCreate,
     current_user: User = Depends(get_current_user_dependency)
 ):
-    # Get next AFAP number
-    last_afap = await db.afap.find_one({}, {"_id": 0, "numero_afap": 1}, sort=[("numero_afap", -1)])
-    next_number = (last_afap["numero_afap"] + 1) if last_afap else 1001
+    # Número de AFAP por contador atómico: $inc sobre un documento único,
+    # sin el sort por numero_afap ni la carrera de "max + 1" bajo concurrencia
+    counter = await db.counters.find_one_and_update(
+        {"_id": "afap"},
+        {"$inc": {"seq": 1}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    next_number = counter["seq"]
     
     # Calculate expiration date (30 days from now)
     fecha_vencimiento = datetime.now(timezone.utc) + timedelta(days=30)
@@ -134,8 +229,6 @@ async def create_afap(
     )
     
     afap_dict = afap.model_dump()
-    afap_dict['fecha_solicitud'] = afap_dict['fecha_solicitud'].isoformat()
-    afap_dict['fecha_vencimiento'] = afap_dict['fecha_vencimiento'].isoformat()
     
     await db.afap.insert_one(afap_dict)
     
@@ -143,6 +236,8 @@ async def create_afap(
 
 @api_router.get("/afap", response_model=List[AFAP])
 async def get_afaps(
+    limit: int = Query(50, ge=1, le=200),
+    offset: int = Query(0, ge=0),
     current_user: User = Depends(get_current_user_dependency)
 ):
     # Admin e inspector ven todos, ciudadano solo los suyos
@@ -151,13 +246,10 @@ async def get_afaps(
     else:
         query = {"user_id": current_user.id}
     
-    afaps = await db.afap.find(query, {"_id": 0}).to_list(1000)
-    
-    for afap in afaps:
-        if isinstance(afap.get('fecha_solicitud'), str):
-            afap['fecha_solicitud'] = datetime.fromisoformat(afap['fecha_solicitud'])
-        if isinstance(afap.get('fecha_vencimiento'), str):
-            afap['fecha_vencimiento'] = datetime.fromisoformat(afap['fecha_vencimiento'])
+    # Paginado del lado del servidor y sin documentos_urls (puede ser pesado):
+    # el costo de wire + decode + validación queda en O(página), no O(colección)
+    afaps = await db.afap.find(query, {"_id": 0, "documentos_urls": 0}) \
+        .sort("fecha_solicitud", -1).skip(offset).limit(limit).to_list(limit)
     
     return afaps
 
@@ -166,7 +258,7 @@ async def get_afap(
     afap_id: str,
     current_user: User = Depends(get_current_user_dependency)
 ):
-    afap = await db.afap.find_one({"id": afap_id}, {"_id": 0})
+    afap = await _get_afap(afap_id, {"_id": 0})
     if not afap:
         raise HTTPException(status_code=404, detail="AFAP no encontrado")
     
@@ -174,17 +266,13 @@ async def get_afap(
     if current_user.role == "ciudadano" and afap["user_id"] != current_user.id:
         raise HTTPException(status_code=403, detail="No autorizado")
     
-    if isinstance(afap.get('fecha_solicitud'), str):
-        afap['fecha_solicitud'] = datetime.fromisoformat(afap['fecha_solicitud'])
-    if isinstance(afap.get('fecha_vencimiento'), str):
-        afap['fecha_vencimiento'] = datetime.fromisoformat(afap['fecha_vencimiento'])
-    
     return AFAP(**afap)
 
 @api_router.patch("/afap/{afap_id}/estado")
 async def update_afap_estado(
     afap_id: str,
     estado: str,
+    background_tasks: BackgroundTasks,
     observaciones: Optional[str] = None,
     current_user: User = Depends(get_current_user_dependency)
 ):
@@ -192,26 +280,31 @@ async def update_afap_estado(
     if current_user.role not in ["inspector", "administrador"]:
         raise HTTPException(status_code=403, detail="No autorizado")
     
-    # Obtener AFAP actual para comparar estado
-    afap_actual = await db.afap.find_one({"id": afap_id}, {"_id": 0})
-    if not afap_actual:
-        raise HTTPException(status_code=404, detail="AFAP no encontrado")
-    
-    old_estado = afap_actual.get("estado")
-    
-    # Actualizar estado
     update_data = {"estado": estado}
     if observaciones:
         update_data["observaciones"] = observaciones
-    
-    result = await db.afap.update_one(
+
+    # Lee el estado anterior y aplica el cambio en una sola operación atómica
+    # (un RTT en lugar de find_one + update_one, y sin ventana de carrera)
+    afap_actual = await db.afap.find_one_and_update(
         {"id": afap_id},
-        {"$set": update_data}
+        {"$set": update_data},
+        return_document=ReturnDocument.BEFORE,
+        # solo lo que consumen la respuesta y los emails de notificación
+        projection={
+            "_id": 0, "estado": 1, "user_id": 1, "numero_afap": 1,
+            "rubro_descripcion": 1, "domicilio_calle": 1, "domicilio_altura": 1,
+            "metros_cuadrados": 1,
+        }
     )
-    
-    if result.matched_count == 0:
+    if not afap_actual:
         raise HTTPException(status_code=404, detail="AFAP no encontrado")
-    
+
+    # El verificador público cachea por afap_id: un cambio de estado lo invalida
+    _verify_cache_pub.pop(afap_id, None)
+
+    old_estado = afap_actual.get("estado")
+
     # Obtener datos del usuario solicitante
     user_solicitante = await db.users.find_one(
         {"id": afap_actual["user_id"]},
@@ -222,31 +315,26 @@ async def update_afap_estado(
         user_name = f"{user_solicitante['nombre']} {user_solicitante['apellido']}"
         user_email = user_solicitante['email']
         
-        # Si se aprueba, enviar email con certificado
+        # Los emails salen después de enviar la respuesta HTTP: el cliente no
+        # necesita esperar el SMTP (las funciones ya loguean sus propios errores)
         if estado == "aprobado" and old_estado != "aprobado":
-            try:
-                await send_certificate_email(
-                    user_email,
-                    user_name,
-                    afap_actual["numero_afap"],
-                    afap_actual
-                )
-                logger.info(f"Certificate email sent for AFAP #{afap_actual['numero_afap']}")
-            except Exception as e:
-                logger.error(f"Error sending certificate email: {str(e)}")
-        
-        # Enviar notificación de cambio de estado
-        try:
-            await send_status_notification(
+            background_tasks.add_task(
+                send_certificate_email,
                 user_email,
                 user_name,
                 afap_actual["numero_afap"],
-                old_estado,
-                estado,
-                observaciones
+                afap_actual
             )
-        except Exception as e:
-            logger.error(f"Error sending status notification: {str(e)}")
+        
+        background_tasks.add_task(
+            send_status_notification,
+            user_email,
+            user_name,
+            afap_actual["numero_afap"],
+            old_estado,
+            estado,
+            observaciones
+        )
     
     return {
         "message": "Estado actualizado correctamente",
@@ -260,8 +348,8 @@ async def download_certificado(
     afap_id: str,
     current_user: User = Depends(get_current_user_dependency)
 ):
-    # Buscar el AFAP
-    afap = await db.afap.find_one({"id": afap_id}, {"_id": 0})
+    # Buscar el AFAP (completo salvo documentos_urls: el PDF no los usa)
+    afap = await _get_afap(afap_id, {"_id": 0, "documentos_urls": 0})
     if not afap:
         raise HTTPException(status_code=404, detail="AFAP no encontrado")
     
@@ -283,17 +371,27 @@ async def download_certificado(
             user_email=current_user.email
         )
         
+        # El log es telemetría: se escribe en segundo plano, la descarga no
+        # espera el RTT de la inserción
         log_dict = download_log.model_dump()
-        log_dict['timestamp'] = log_dict['timestamp'].isoformat()
-        await db.download_logs.insert_one(log_dict)
-        
-        logger.info(f"Certificate downloaded: AFAP #{afap['numero_afap']} by {current_user.email}")
+        _spawn_write(db.download_logs.insert_one(log_dict))
+
+        logger.info("Certificate downloaded: AFAP #%s by %s", afap["numero_afap"], current_user.email)
     except Exception as e:
-        logger.error(f"Error logging download: {str(e)}")
+        logger.exception("Error logging download: %s", e)
     
-    # Generar PDF
+    # Generar PDF (cacheado: re-descargas del mismo AFAP sin cambios de estado
+    # devuelven los bytes ya renderizados en lugar de volver a dibujar)
     try:
-        pdf_bytes = generate_afap_certificate(afap)
+        cache_key = (afap_id, afap["estado"], afap.get("observaciones"))
+        pdf_bytes = _pdf_cache.get(cache_key)
+        if pdf_bytes is None:
+            pdf_bytes = await asyncio.get_event_loop().run_in_executor(
+                _pdf_pool, generate_afap_certificate, afap
+            )
+            while len(_pdf_cache) >= _PDF_CACHE_MAX:
+                _pdf_cache.pop(next(iter(_pdf_cache)))
+            _pdf_cache[cache_key] = pdf_bytes
         
         # Crear respuesta con el PDF
         return StreamingResponse(
@@ -304,26 +402,27 @@ async def download_certificado(
             }
         )
     except Exception as e:
-        logger.error(f"Error generating certificate: {str(e)}")
-        raise HTTPException(status_code=500, detail="Error al generar el certificado")
+        logger.exception("Error generating certificate: %s", e)
+        raise _CERT_ERROR from e
 
 @api_router.get("/afap/{afap_id}/descargas")
 async def get_download_history(
     afap_id: str,
+    limit: int = Query(100, ge=1, le=500),
+    before: Optional[datetime] = Query(None),
     current_user: User = Depends(get_current_user_dependency)
 ):
     # Solo admin puede ver historial completo
     if current_user.role != "administrador":
         raise HTTPException(status_code=403, detail="No autorizado")
     
+    # Keyset sobre el índice (afap_id, timestamp desc)
+    query = {"afap_id": afap_id}
+    if before is not None:
+        query["timestamp"] = {"$lt": before}
     logs = await db.download_logs.find(
-        {"afap_id": afap_id},
-        {"_id": 0}
-    ).sort("timestamp", -1).to_list(100)
-    
-    for log in logs:
-        if isinstance(log.get('timestamp'), str):
-            log['timestamp'] = datetime.fromisoformat(log['timestamp'])
+        query, {"_id": 0}
+    ).sort("timestamp", -1).limit(limit).to_list(limit)
     
     return logs
 
@@ -340,10 +439,6 @@ async def create_inspeccion(
     inspeccion = Inspeccion(**inspeccion_data.model_dump())
     
     inspeccion_dict = inspeccion.model_dump()
-    inspeccion_dict['fecha_programada'] = inspeccion_dict['fecha_programada'].isoformat()
-    inspeccion_dict['created_at'] = inspeccion_dict['created_at'].isoformat()
-    if inspeccion_dict.get('fecha_realizada'):
-        inspeccion_dict['fecha_realizada'] = inspeccion_dict['fecha_realizada'].isoformat()
     
     await db.inspecciones.insert_one(inspeccion_dict)
     
@@ -351,32 +446,74 @@ async def create_inspeccion(
 
 @api_router.get("/inspecciones", response_model=List[Inspeccion])
 async def get_inspecciones(
+    limit: int = Query(50, ge=1, le=200),
+    offset: int = Query(0, ge=0),
     current_user: User = Depends(get_current_user_dependency)
 ):
+    # Orden determinístico: sin sort, skip/limit puede saltear o duplicar
+    # filas entre páginas
     if current_user.role == "inspector":
-        query = {"inspector_id": current_user.id}
+        inspecciones = await db.inspecciones.find(
+            {"inspector_id": current_user.id}, {"_id": 0}
+        ).sort("fecha_programada", -1).skip(offset).limit(limit).to_list(limit)
     elif current_user.role == "administrador":
-        query = {}
+        inspecciones = await db.inspecciones.find(
+            {}, {"_id": 0}
+        ).sort("fecha_programada", -1).skip(offset).limit(limit).to_list(limit)
     else:
-        # Ciudadanos ven inspecciones de sus AFAPs
-        user_afaps = await db.afap.find({"user_id": current_user.id}, {"_id": 0, "id": 1}).to_list(1000)
-        afap_ids = [afap["id"] for afap in user_afaps]
-        query = {"afap_id": {"$in": afap_ids}}
-    
-    inspecciones = await db.inspecciones.find(query, {"_id": 0}).to_list(1000)
-    
-    for inspeccion in inspecciones:
-        if isinstance(inspeccion.get('fecha_programada'), str):
-            inspeccion['fecha_programada'] = datetime.fromisoformat(inspeccion['fecha_programada'])
-        if isinstance(inspeccion.get('fecha_realizada'), str):
-            inspeccion['fecha_realizada'] = datetime.fromisoformat(inspeccion['fecha_realizada'])
-        if isinstance(inspeccion.get('created_at'), str):
-            inspeccion['created_at'] = datetime.fromisoformat(inspeccion['created_at'])
+        # Ciudadanos ven inspecciones de sus AFAPs: un solo pipeline con
+        # $lookup en lugar de listar los ids y hacer una segunda query $in
+        inspecciones = await _aggregate_list(db.inspecciones, [
+            {"$lookup": {
+                "from": "afap",
+                "localField": "afap_id",
+                "foreignField": "id",
+                "as": "afap"
+            }},
+            {"$match": {"afap.user_id": current_user.id}},
+            {"$project": {"_id": 0, "afap": 0}},
+            {"$sort": {"fecha_programada": -1}},
+            {"$skip": offset},
+            {"$limit": limit}
+        ], limit)
     
     return inspecciones
 
 # ============ AI ASSISTANT ENDPOINTS ============
 
+# Historial recortado por sesión de chat (últimos 10 mensajes): en sesiones
+# calientes evita re-leer el historial de Mongo en cada turno
+_SESSION_CACHE_TTL = 1800
+_SESSION_CACHE_MAX = 10_000
+_session_cache: dict = {}  # session_id -> (expira_epoch, deque de {"role","content"})
+
+# Prompt de sistema a nivel módulo (con saltos de línea reales: la versión
+# anterior mandaba literales "\n" al modelo, desperdiciando tokens de entrada);
+# por request solo se formatean los campos del usuario
+_SYSTEM_PROMPT_TMPL = (
+    "Eres un asistente virtual del Argentina, especializado en habilitaciones comerciales y el sistema de Habilitación Precaria Automática.\n\n"
+    "Tu rol es:\n"
+    "1. Ayudar a los ciudadanos a entender los requisitos para habilitar comercios\n"
+    "2. Guiar paso a paso en el proceso de solicitud de AFAP\n"
+    "3. Responder preguntas sobre documentación requerida\n"
+    "4. Explicar el estado de los trámites\n"
+    "5. Ser amigable, claro y usar español argentino\n\n"
+    "Información del usuario:\n"
+    "- Nombre: {nombre}\n"
+    "- CUIT/CUIL: {cuit}\n"
+    "- Rol: {role}\n\n"
+    "Requisitos principales para AFAP:\n"
+    "- Locales menores a 200 m² (oficinas 300 m²)\n"
+    "- Boleta de ABL\n"
+    "- Plano o croquis del local\n"
+    "- DNI del interesado\n"
+    "- Para empresas: estatuto, contrato social\n"
+    "- Constancia de IIBB\n"
+    "- Derecho de uso del inmueble\n\n"
+    "El AFAP tiene validez de 30 días y permite operar mientras se gestiona la habilitación definitiva.\n\n"
+    "Respondé de forma concisa, amigable y en español argentino."
+)
+
 @api_router.post("/ai/chat")
 async def chat_with_ai(
     chat_request: ChatRequest,
@@ -392,44 +529,39 @@ async def chat_with_ai(
         )
         
         user_msg_dict = user_msg.model_dump()
-        user_msg_dict['timestamp'] = user_msg_dict['timestamp'].isoformat()
-        await db.chat_messages.insert_one(user_msg_dict)
-        
-        # Get conversation history
-        history = await db.chat_messages.find(
-            {"session_id": chat_request.session_id},
-            {"_id": 0}
-        ).sort("timestamp", 1).limit(10).to_list(10)
-        
+
+        # Historial de conversación: del cache por sesión si está caliente,
+        # de Mongo solo en el primer turno (o tras expirar el TTL)
+        now = time.time()
+        cached = _session_cache.get(chat_request.session_id)
+        if cached is not None and now < cached[0]:
+            history = cached[1]
+        else:
+            docs = await db.chat_messages.find(
+                {"session_id": chat_request.session_id},
+                {"_id": 0, "role": 1, "content": 1}
+            ).sort("timestamp", 1).limit(10).to_list(10)
+            history = deque(
+                ({"role": d.get("role", "user"), "content": d.get("content", "")} for d in docs),
+                maxlen=10
+            )
+            if len(_session_cache) >= _SESSION_CACHE_MAX:
+                for k in [k for k, v in _session_cache.items() if v[0] <= now]:
+                    _session_cache.pop(k, None)
+                while len(_session_cache) >= _SESSION_CACHE_MAX:
+                    _session_cache.pop(next(iter(_session_cache)))
+        _session_cache[chat_request.session_id] = (now + _SESSION_CACHE_TTL, history)
+
         # System message with context
-        system_message = (
-            f"Eres un asistente virtual del Argentina, especializado en habilitaciones comerciales y el sistema de Habilitación Precaria Automática.\\n\\n"
-            f"Tu rol es:\\n"
-            f"1. Ayudar a los ciudadanos a entender los requisitos para habilitar comercios\\n"
-            f"2. Guiar paso a paso en el proceso de solicitud de AFAP\\n"
-            f"3. Responder preguntas sobre documentación requerida\\n"
-            f"4. Explicar el estado de los trámites\\n"
-            f"5. Ser amigable, claro y usar español argentino\\n\\n"
-            f"Información del usuario:\\n"
-            f"- Nombre: {current_user.nombre} {current_user.apellido}\\n"
-            f"- CUIT/CUIL: {current_user.cuit_cuil}\\n"
-            f"- Rol: {current_user.role}\\n\\n"
-            f"Requisitos principales para AFAP:\\n"
-            f"- Locales menores a 200 m² (oficinas 300 m²)\\n"
-            f"- Boleta de ABL\\n"
-            f"- Plano o croquis del local\\n"
-            f"- DNI del interesado\\n"
-            f"- Para empresas: estatuto, contrato social\\n"
-            f"- Constancia de IIBB\\n"
-            f"- Derecho de uso del inmueble\\n\\n"
-            f"El AFAP tiene validez de 30 días y permite operar mientras se gestiona la habilitación definitiva.\\n\\n"
-            f"Respondé de forma concisa, amigable y en español argentino."
+        system_message = _SYSTEM_PROMPT_TMPL.format(
+            nombre=f"{current_user.nombre} {current_user.apellido}",
+            cuit=current_user.cuit_cuil,
+            role=current_user.role,
         )
         
-        # Build messages for OpenAI
+        # Build messages for OpenAI (el deque no incluye el mensaje actual)
         messages = [{"role": "system", "content": system_message}]
-        for msg in history[:-1]:
-            messages.append({"role": msg.get("role", "user"), "content": msg.get("content", "")})
+        messages.extend(history)
         messages.append({"role": "user", "content": chat_request.message})
         
         # Get AI response
@@ -450,16 +582,32 @@ async def chat_with_ai(
         )
         
         assistant_msg_dict = assistant_msg.model_dump()
-        assistant_msg_dict['timestamp'] = assistant_msg_dict['timestamp'].isoformat()
-        await db.chat_messages.insert_one(assistant_msg_dict)
-        
+
+        # Actualizar el cache (el deque se trunca solo a 10) y persistir ambos
+        # mensajes en un solo insert_many en segundo plano: la respuesta no
+        # espera las escrituras
+        history.append({"role": "user", "content": chat_request.message})
+        history.append({"role": "assistant", "content": ai_response})
+        _spawn_write(
+            db.chat_messages.insert_many([user_msg_dict, assistant_msg_dict], ordered=False)
+        )
+
         return {
             "response": ai_response,
             "session_id": chat_request.session_id
         }
         
     except Exception as e:
-        logger.error(f"Error in AI chat: {str(e)}")
+        logger.exception("Error in AI chat: %s", e)
+        # El mensaje del usuario se persiste igual, como hacía el flujo
+        # original, y se descarta la entrada caliente de la sesión para que
+        # el próximo turno recargue el historial desde Mongo en lugar de
+        # servir un contexto divergente por hasta 30 minutos
+        try:
+            _spawn_write(db.chat_messages.insert_one(user_msg_dict))
+            _session_cache.pop(chat_request.session_id, None)
+        except Exception:
+            pass
         # Fallback response
         fallback_response = "Disculpá, estoy teniendo problemas técnicos. Por favor, intentá de nuevo en unos momentos."
         return {
@@ -470,16 +618,23 @@ async def chat_with_ai(
 @api_router.get("/ai/chat/history/{session_id}")
 async def get_chat_history(
     session_id: str,
+    limit: int = Query(100, ge=1, le=500),
+    before: Optional[datetime] = Query(None),
     current_user: User = Depends(get_current_user_dependency)
 ):
+    # Paginación keyset sobre el índice (session_id, timestamp): costo
+    # constante sin importar cuán atrás se navegue, a diferencia de skip.
+    # Se lee descendente desde el cursor (los `limit` mensajes anteriores a
+    # `before`) y se invierte, para devolver la página adyacente en orden
+    # cronológico -- con sort ascendente se devolvería siempre la página
+    # más vieja de la sesión.
+    query = {"session_id": session_id, "user_id": current_user.id}
+    if before is not None:
+        query["timestamp"] = {"$lt": before}
     messages = await db.chat_messages.find(
-        {"session_id": session_id, "user_id": current_user.id},
-        {"_id": 0}
-    ).sort("timestamp", 1).to_list(100)
-    
-    for msg in messages:
-        if isinstance(msg.get('timestamp'), str):
-            msg['timestamp'] = datetime.fromisoformat(msg['timestamp'])
+        query, {"_id": 0}
+    ).sort("timestamp", -1).limit(limit).to_list(limit)
+    messages.reverse()
     
     return messages
 
@@ -507,28 +662,27 @@ async def get_dashboard_stats(
     if current_user.role not in ["inspector", "administrador"]:
         raise HTTPException(status_code=403, detail="No autorizado")
     
-    # Count AFAPs by status
-    total_afaps = await db.afap.count_documents({})
-    pendientes = await db.afap.count_documents({"estado": "pendiente"})
-    aprobados = await db.afap.count_documents({"estado": "aprobado"})
-    rechazados = await db.afap.count_documents({"estado": "rechazado"})
-    en_inspeccion = await db.afap.count_documents({"estado": "inspeccion"})
-    
-    # Count inspections
-    inspecciones_programadas = await db.inspecciones.count_documents({"estado": "programada"})
-    inspecciones_completadas = await db.inspecciones.count_documents({"estado": "completada"})
-    
-    # Count users by role
-    total_usuarios = await db.users.count_documents({})
-    
-    # Recent AFAPs
-    recent_afaps = await db.afap.find({}, {"_id": 0}).sort("fecha_solicitud", -1).limit(5).to_list(5)
-    for afap in recent_afaps:
-        if isinstance(afap.get('fecha_solicitud'), str):
-            afap['fecha_solicitud'] = datetime.fromisoformat(afap['fecha_solicitud'])
-        if isinstance(afap.get('fecha_vencimiento'), str):
-            afap['fecha_vencimiento'] = datetime.fromisoformat(afap['fecha_vencimiento'])
-    
+    # Un solo $group por colección trae todos los buckets de estado en un RTT,
+    # y las cuatro consultas independientes corren concurrentes bajo gather
+    # (antes: 8 awaits seriales = 8 RTTs encadenados)
+    afap_buckets, insp_buckets, total_usuarios, recent_afaps = await asyncio.gather(
+        _aggregate_list(db.afap, [{"$group": {"_id": "$estado", "n": {"$sum": 1}}}]),
+        _aggregate_list(db.inspecciones, [{"$group": {"_id": "$estado", "n": {"$sum": 1}}}]),
+        db.users.count_documents({}),
+        db.afap.find({}, {"_id": 0}).sort("fecha_solicitud", -1).limit(5).to_list(5),
+    )
+
+    afap_counts = {b["_id"]: b["n"] for b in afap_buckets}
+    insp_counts = {b["_id"]: b["n"] for b in insp_buckets}
+
+    total_afaps = sum(afap_counts.values())
+    pendientes = afap_counts.get("pendiente", 0)
+    aprobados = afap_counts.get("aprobado", 0)
+    rechazados = afap_counts.get("rechazado", 0)
+    en_inspeccion = afap_counts.get("inspeccion", 0)
+
+    inspecciones_programadas = insp_counts.get("programada", 0)
+    inspecciones_completadas = insp_counts.get("completada", 0)
     return {
         "afaps": {
             "total": total_afaps,
@@ -554,102 +708,283 @@ async def upload_file(
     file: UploadFile = File(...),
     current_user: User = Depends(get_current_user_dependency)
 ):
-    # Simple base64 encoding for demo purposes
-    # In production, use cloud storage (S3, etc.)
+    # Streaming por chunks a GridFS: sin cargar el archivo entero en RAM ni
+    # inflarlo +33% con base64 dentro de un documento normal
     try:
-        contents = await file.read()
-        encoded = base64.b64encode(contents).decode('utf-8')
-        
+        grid_in = fs_bucket.open_upload_stream(
+            file.filename,
+            metadata={"content_type": file.content_type, "user_id": current_user.id}
+        )
+        # Los chunks se escriben en fs.chunks a medida que llegan y la entrada
+        # en fs.files recién aparece en close(): si algo falla a mitad de la
+        # subida (cliente desconectado, error de Mongo) hay que abort() para
+        # no dejar chunks huérfanos e invisibles para cualquier limpieza
+        try:
+            while chunk := await file.read(8 * 1024 * 1024):
+                await grid_in.write(chunk)
+            await grid_in.close()
+        except Exception:
+            await grid_in.abort()
+            raise
+
         file_data = {
             "filename": file.filename,
             "content_type": file.content_type,
-            "data": encoded,
+            "gridfs_id": str(grid_in._id),
             "user_id": current_user.id,
-            "uploaded_at": datetime.now(timezone.utc).isoformat()
+            "uploaded_at": datetime.now(timezone.utc)
         }
-        
-        result = await db.uploads.insert_one(file_data)
-        
+
+        await db.uploads.insert_one(file_data)
+
         return {
-            "url": f"/api/uploads/{file.filename}",
+            "url": f"/api/uploads/{grid_in._id}",
             "filename": file.filename
         }
     except Exception as e:
-        logger.error(f"Error uploading file: {str(e)}")
-        raise HTTPException(status_code=500, detail="Error al subir el archivo")
+        logger.exception("Error uploading file: %s", e)
+        raise _UPLOAD_ERROR from e
+
+@api_router.get("/uploads/{file_id}")
+async def download_file(
+    file_id: str,
+    current_user: User = Depends(get_current_user_dependency)
+):
+    from bson import ObjectId
+    from bson.errors import InvalidId
+    from gridfs.errors import NoFile
+
+    try:
+        grid_out = await fs_bucket.open_download_stream(ObjectId(file_id))
+    except (InvalidId, NoFile):
+        raise HTTPException(status_code=404, detail="Archivo no encontrado")
+
+    metadata = grid_out.metadata or {}
+
+    # Solo el dueño del archivo (o un administrador) puede descargarlo
+    if current_user.role != "administrador" and metadata.get("user_id") != current_user.id:
+        raise HTTPException(status_code=403, detail="No autorizado")
+
+    content_type = metadata.get("content_type", "application/octet-stream")
+
+    # El filename viene del upload (input del usuario): se sanea antes de
+    # meterlo en un header para evitar inyección de CR/LF o comillas
+    safe_filename = "".join(
+        c for c in (grid_out.filename or "archivo") if c.isalnum() or c in "._- "
+    ) or "archivo"
+
+    async def stream_chunks():
+        while chunk := await grid_out.readchunk():
+            yield chunk
+
+    return StreamingResponse(
+        stream_chunks(),
+        media_type=content_type,
+        headers={"Content-Disposition": f'attachment; filename="{safe_filename}"'}
+    )
+
+# ============ SEED ENDPOINT (SOLO DESARROLLO) ============
+
+# El seed es determinístico, así que su respuesta también: los bytes JSON se
+# serializan una vez y las corridas siguientes los devuelven tal cual
+_seed_ok_bytes = None
+
+@api_router.post("/seed")
+async def seed_endpoint():
+    """
+    Puebla la base con datos de demo. Deshabilitado por defecto: sin el flag
+    SEED_ENABLED cualquiera podría vaciar las colecciones (el seed borra todo).
+    """
+    if os.getenv("SEED_ENABLED", "").lower() not in ("1", "true"):
+        raise HTTPException(status_code=403, detail="Seed deshabilitado fuera de desarrollo")
+
+    from pymongo.errors import BulkWriteError
+    from seed_data import seed_database
+    global _seed_ok_bytes
+    try:
+        result = await seed_database(db)
+        if _seed_ok_bytes is None:
+            _seed_ok_bytes = orjson.dumps({"message": "Database seeded successfully", **result})
+        return Response(content=_seed_ok_bytes, media_type="application/json")
+    except BulkWriteError as e:
+        # Un reseed concurrente puede chocar contra los índices únicos: si
+        # todos los errores son dup-key (11000) los datos ya están, no es un 500
+        # (y evitamos formatear el payload gigante de la excepción)
+        if all(err.get("code") == 11000 for err in e.details.get("writeErrors", [])):
+            return {"message": "already seeded"}
+        logger.exception("Seed bulk write error: %s", e.details)
+        raise _SEED_ERROR from e
+    except Exception as e:
+        logger.exception("Seed error: %s", e)
+        raise _SEED_ERROR from e
 
 # ============ PUBLIC VERIFICATION ENDPOINT ============
 
+# Cache de respuestas del verificador público: el documento solo cambia en
+# update_afap_estado (que lo invalida), y las ráfagas de escaneos QR de un
+# mismo certificado no deberían golpear Mongo una vez por scan. Como el
+# endpoint es público, el tamaño se acota con evicción perezosa igual que
+# los demás caches del módulo
+_VERIFY_CACHE_TTL = 60
+_VERIFY_CACHE_PUB_MAX = 10_000
+_verify_cache_pub: dict = {}  # afap_id -> (expira_epoch, etag, body)
+
+# Proyección exacta de los campos públicos que devuelve el endpoint
+_VERIFY_PROJECTION = {
+    "_id": 0, "id": 1, "numero_afap": 1, "estado": 1, "titular_nombre": 1,
+    "titular_cuit": 1, "domicilio_calle": 1, "domicilio_altura": 1,
+    "domicilio_local": 1, "domicilio_localidad": 1, "rubro_tipo": 1,
+    "rubro_descripcion": 1, "metros_cuadrados": 1, "fecha_solicitud": 1,
+    "fecha_vencimiento": 1, "observaciones": 1,
+}
+
 @api_router.get("/verificar/{afap_id}")
-async def verificar_certificado_publico(afap_id: str):
+async def verificar_certificado_publico(afap_id: str, request: Request, response: Response):
     """
     Endpoint público para verificar certificados vía QR code
     No requiere autenticación
     """
     try:
-        afap = await db.afap.find_one({"id": afap_id}, {"_id": 0})
-        
-        if not afap:
-            raise HTTPException(
-                status_code=404,
-                detail="Certificado no encontrado. Verificá el código QR."
-            )
-        
-        # Convertir fechas
-        if isinstance(afap.get('fecha_solicitud'), str):
-            afap['fecha_solicitud'] = datetime.fromisoformat(afap['fecha_solicitud'])
-        if isinstance(afap.get('fecha_vencimiento'), str):
-            afap['fecha_vencimiento'] = datetime.fromisoformat(afap['fecha_vencimiento'])
-        
-        # Devolver solo info pública (sin datos sensibles del solicitante)
-        return {
-            "id": afap["id"],
-            "numero_afap": afap["numero_afap"],
-            "estado": afap["estado"],
-            "titular_nombre": afap["titular_nombre"],
-            "titular_cuit": afap["titular_cuit"],
-            "domicilio_calle": afap["domicilio_calle"],
-            "domicilio_altura": afap["domicilio_altura"],
-            "domicilio_local": afap.get("domicilio_local"),
-            "domicilio_localidad": afap["domicilio_localidad"],
-            "rubro_tipo": afap["rubro_tipo"],
-            "rubro_descripcion": afap["rubro_descripcion"],
-            "metros_cuadrados": afap["metros_cuadrados"],
-            "fecha_solicitud": afap["fecha_solicitud"].isoformat(),
-            "fecha_vencimiento": afap["fecha_vencimiento"].isoformat() if afap.get("fecha_vencimiento") else None,
-            "observaciones": afap.get("observaciones")
-        }
-        
+        now = time.time()
+        cached = _verify_cache_pub.get(afap_id)
+        if cached is None or now >= cached[0]:
+            afap = await db.afap.find_one({"id": afap_id}, _VERIFY_PROJECTION)
+
+            if not afap:
+                raise HTTPException(
+                    status_code=404,
+                    detail="Certificado no encontrado. Verificá el código QR."
+                )
+
+            # Devolver solo info pública (sin datos sensibles del solicitante)
+            body = {
+                "id": afap["id"],
+                "numero_afap": afap["numero_afap"],
+                "estado": afap["estado"],
+                "titular_nombre": afap["titular_nombre"],
+                "titular_cuit": afap["titular_cuit"],
+                "domicilio_calle": afap["domicilio_calle"],
+                "domicilio_altura": afap["domicilio_altura"],
+                "domicilio_local": afap.get("domicilio_local"),
+                "domicilio_localidad": afap["domicilio_localidad"],
+                "rubro_tipo": afap["rubro_tipo"],
+                "rubro_descripcion": afap["rubro_descripcion"],
+                "metros_cuadrados": afap["metros_cuadrados"],
+                # FastAPI serializa los datetime a ISO en la respuesta JSON
+                "fecha_solicitud": afap["fecha_solicitud"],
+                "fecha_vencimiento": afap.get("fecha_vencimiento"),
+                "observaciones": afap.get("observaciones")
+            }
+            etag = '"' + hashlib.sha1(
+                f"{body['estado']}|{body['observaciones']}|{body['fecha_vencimiento']}".encode()
+            ).hexdigest() + '"'
+
+            # Evicción perezosa: primero lo vencido, después lo más viejo
+            if len(_verify_cache_pub) >= _VERIFY_CACHE_PUB_MAX:
+                for k in [k for k, v in _verify_cache_pub.items() if v[0] <= now]:
+                    _verify_cache_pub.pop(k, None)
+                while len(_verify_cache_pub) >= _VERIFY_CACHE_PUB_MAX:
+                    _verify_cache_pub.pop(next(iter(_verify_cache_pub)))
+
+            cached = (now + _VERIFY_CACHE_TTL, etag, body)
+            _verify_cache_pub[afap_id] = cached
+
+        _, etag, body = cached
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers={"ETag": etag})
+        response.headers["ETag"] = etag
+        return body
+
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error verifying certificate: {str(e)}")
-        raise HTTPException(status_code=500, detail="Error al verificar el certificado")
+        logger.exception("Error verifying certificate: %s", e)
+        raise _VERIFY_ERROR from e
 
 # Include the router
 app.include_router(api_router)
 
+# Orígenes saneados (sin espacios ni entradas vacías). "*" junto con
+# allow_credentials=True es inválido según la spec CORS y el navegador lo
+# rechaza en silencio, así que se corta en el arranque. max_age deja que el
+# browser cachee los preflights OPTIONS por un día.
+cors_origins = [o.strip() for o in os.environ.get('CORS_ORIGINS', '*').split(',') if o.strip()]
+if "*" in cors_origins and len(cors_origins) > 1:
+    raise RuntimeError("CORS_ORIGINS: '*' no puede mezclarse con orígenes explícitos")
+allow_credentials = "*" not in cors_origins
+
 app.add_middleware(
     CORSMiddleware,
-    allow_credentials=True,
-    allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
+    allow_credentials=allow_credentials,
+    allow_origins=cors_origins,
     allow_methods=["*"],
     allow_headers=["*"],
+    max_age=86400,
 )
 
 @app.get("/")
 async def root():
     return {"name": "Argentina Habilitaciones API", "version": "1.0", "status": "running", "docs": "/docs"}
 
+# Con N réplicas y probes de readiness por segundo, /health se vuelve tráfico
+# continuo contra Mongo: el resultado se cachea 1 segundo
+_HEALTH_CACHE_TTL = 1.0
+_health_cache = {"expires": 0.0, "healthy": False}
+
 @app.get("/health")
 @api_router.get("/health")
 async def health_check():
-    try:
-        await db.command('ping')
+    now = time.time()
+    if now >= _health_cache["expires"]:
+        try:
+            await db.command('ping')
+            _health_cache["healthy"] = True
+        except:
+            _health_cache["healthy"] = False
+        _health_cache["expires"] = now + _HEALTH_CACHE_TTL
+    if _health_cache["healthy"]:
         return {"status": "healthy", "database": "connected"}
-    except:
-        return JSONResponse(status_code=503, content={"status": "unhealthy"})
+    return JSONResponse(status_code=503, content={"status": "unhealthy"})
+
+@app.on_event("startup")
+async def create_db_indexes():
+    # Warmup: un ping en el arranque levanta las conexiones del pool antes
+    # del primer request real
+    await db.command('ping')
+    # Índices para cada filtro/sort caliente de los endpoints: sin ellos todas
+    # estas queries son COLLSCANs que empeoran linealmente con los datos.
+    # create_index es idempotente, y en paralelo solo cuesta un RTT "largo".
+    await asyncio.gather(
+        # la búsqueda por cuit_cuil corre en cada request autenticado (JWT)
+        db.users.create_index("cuit_cuil", unique=True),
+        db.users.create_index("email", unique=True),
+        db.users.create_index("id", unique=True),
+        db.afap.create_index("id", unique=True),
+        db.afap.create_index("user_id"),
+        # unique: un contador desincronizado debe fallar ruidosamente, no
+        # emitir números duplicados en silencio
+        db.afap.create_index([("numero_afap", -1)], unique=True),
+        db.afap.create_index([("fecha_solicitud", -1)]),
+        db.afap.create_index("estado"),
+        db.inspecciones.create_index("inspector_id"),
+        db.inspecciones.create_index("afap_id"),
+        db.chat_messages.create_index([("session_id", 1), ("timestamp", 1)]),
+        db.download_logs.create_index([("afap_id", 1), ("timestamp", -1)]),
+    )
+    # Contador de números de AFAP: arranca en 1000 así el primer $inc emite 1001
+    await db.counters.update_one(
+        {"_id": "afap"},
+        {"$setOnInsert": {"seq": 1000}},
+        upsert=True
+    )
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    client.close()
+    # En la API async nativa close() es una corrutina que drena el pool
+    # multiplexado; el timeout evita colgar el shutdown en un reload
+    start = time.monotonic()
+    try:
+        await asyncio.wait_for(client.close(), timeout=5.0)
+        logger.info("Mongo pool drained in %.3fs", time.monotonic() - start)
+    except asyncio.TimeoutError:
+        logger.warning("Mongo pool drain timed out after 5s")